@@ -9,6 +9,7 @@ from types import MappingProxyType
 from typing import Any, Awaitable, Callable, Mapping
 
 import importlib
+import importlib.util
 
 
 @dataclass(frozen=True, slots=True)
@@ -58,6 +59,10 @@ def _load_msgspec() -> Any:
     return importlib.import_module("msgspec")
 
 
+def msgpack_available() -> bool:
+    return importlib.util.find_spec("msgspec") is not None
+
+
 def serialize_to_msgpack(data: Any) -> bytes:
     msgspec = _load_msgspec()
     return msgspec.msgpack.encode(data)
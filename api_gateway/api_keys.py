@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, Protocol
+
+if TYPE_CHECKING:
+    import sqlite3
+
+DEFAULT_CACHE_TTL_SECONDS = 60.0
+DEFAULT_NEGATIVE_TTL_SECONDS = 5.0
+DEFAULT_MAX_CACHED_KEYS = 10_000
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS api_keys (
+    key_sha256 TEXT PRIMARY KEY,
+    tenant TEXT NOT NULL,
+    rate_per_second REAL,
+    burst REAL,
+    revoked INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+class ApiKeyRejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: float | None = None) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class KeyRecord(NamedTuple):
+    # A NamedTuple rather than a frozen dataclass: same immutability, a fraction of the import cost.
+    tenant: str
+    rate_per_second: float | None = None
+    burst: float | None = None
+
+
+class KeyVerifier(Protocol):
+    def lookup(self, key_digest: bytes) -> KeyRecord | None:
+        """Returns the record for a SHA-256 key digest, or ``None`` if the key is unknown or revoked."""
+
+
+def hash_api_key(api_key: str) -> bytes:
+    return hashlib.sha256(api_key.encode("utf-8")).digest()
+
+
+class AllowAnyKeyVerifier:
+    """Accepts every non-empty key; each distinct key is its own tenant for rate limiting."""
+
+    def lookup(self, key_digest: bytes) -> KeyRecord | None:
+        return KeyRecord(tenant=key_digest.hex()[:16])
+
+
+class FileKeyVerifier:
+    """Keys from a JSON file: ``{"keys": [{"key_sha256" | "key": ..., "tenant": ..., "rate_per_second": ...}]}``.
+
+    The file is re-read when its mtime or size changes, so keys can be rotated without a restart.
+    A missing or half-written file keeps the previous keys in place until it is readable again.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._records: dict[bytes, KeyRecord] = {}
+        self._signature: tuple[int, int] | None = None
+        self._lock = threading.Lock()
+        self.last_error: str | None = None
+
+    def _load(self) -> None:
+        try:
+            stat = self.path.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._signature:
+                return
+            with self.path.open("r", encoding="utf-8") as handle:
+                entries = json.load(handle).get("keys", [])
+            records = {}
+            for entry in entries:
+                if entry.get("revoked"):
+                    continue
+                digest = bytes.fromhex(entry["key_sha256"]) if "key_sha256" in entry else hash_api_key(entry["key"])
+                records[digest] = KeyRecord(entry["tenant"], entry.get("rate_per_second"), entry.get("burst"))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as exc:
+            self.last_error = str(exc)
+            return
+        self._records = records
+        self._signature = signature
+        self.last_error = None
+
+    def lookup(self, key_digest: bytes) -> KeyRecord | None:
+        with self._lock:
+            self._load()
+        return self._records.get(key_digest)
+
+
+class SqliteKeyVerifier:
+    """Keys in an ``api_keys`` table (see ``SQLITE_SCHEMA``); one connection per thread."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            import sqlite3  # only SQLite-backed deployments pay for the import
+
+            connection = self._local.connection = sqlite3.connect(self.path)
+            connection.execute(SQLITE_SCHEMA)
+        return connection
+
+    def lookup(self, key_digest: bytes) -> KeyRecord | None:
+        row = self._connection().execute(
+            "SELECT tenant, rate_per_second, burst FROM api_keys WHERE key_sha256 = ? AND revoked = 0",
+            (key_digest.hex(),),
+        ).fetchone()
+        return None if row is None else KeyRecord(*row)
+
+    def add(self, api_key: str, tenant: str, rate_per_second: float | None = None, burst: float | None = None) -> None:
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO api_keys (key_sha256, tenant, rate_per_second, burst) VALUES (?, ?, ?, ?)",
+                (hash_api_key(api_key).hex(), tenant, rate_per_second, burst),
+            )
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def try_acquire(self, now: float) -> float:
+        """Takes one token; returns 0 on success, otherwise the seconds until one is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class ApiKeyAuthenticator:
+    """Verifier results cached by key digest (including misses) plus a token bucket per tenant.
+
+    Every check is a few dict operations under one lock; the verifier is only consulted on a cache miss
+    and outside the lock, so a slow store never blocks requests for keys that are already cached.
+    """
+
+    def __init__(
+        self,
+        verifier: KeyVerifier,
+        ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS,
+        negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+        default_rate_per_second: float | None = None,
+        default_burst: float | None = None,
+        max_entries: int = DEFAULT_MAX_CACHED_KEYS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.verifier = verifier
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.default_rate_per_second = default_rate_per_second
+        self.default_burst = default_burst
+        self.max_entries = max_entries
+        self._clock = clock
+        self._cache: OrderedDict[bytes, tuple[KeyRecord | None, float]] = OrderedDict()
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "negative_hits": 0, "verifier_lookups": 0, "rejected": 0, "rate_limited": 0}
+
+    @classmethod
+    def from_env(cls) -> "ApiKeyAuthenticator":
+        rate = float(os.getenv("AGNS_API_KEY_RATE_PER_SECOND", "0"))
+        burst = os.getenv("AGNS_API_KEY_BURST")
+        return cls(
+            verifier=verifier_from_spec(os.getenv("AGNS_API_KEY_VERIFIER", "any")),
+            ttl_seconds=float(os.getenv("AGNS_API_KEY_CACHE_TTL_SECONDS", str(DEFAULT_CACHE_TTL_SECONDS))),
+            negative_ttl_seconds=float(
+                os.getenv("AGNS_API_KEY_NEGATIVE_TTL_SECONDS", str(DEFAULT_NEGATIVE_TTL_SECONDS))
+            ),
+            default_rate_per_second=rate if rate > 0 else None,
+            default_burst=float(burst) if burst else None,
+        )
+
+    def authenticate(self, api_key: str | None, consume: bool = True) -> KeyRecord:
+        if not api_key:
+            raise ApiKeyRejected(401, "missing X-API-Key")
+        digest = hash_api_key(api_key)
+        now = self._clock()
+        with self._lock:
+            cached = self._cache.get(digest)
+            if cached is not None and cached[1] > now:
+                self._cache.move_to_end(digest)
+                record = cached[0]
+                self.stats["cache_hits" if record is not None else "negative_hits"] += 1
+            else:
+                cached = None
+        if cached is None:
+            record = self.verifier.lookup(digest)
+            ttl = self.ttl_seconds if record is not None else self.negative_ttl_seconds
+            with self._lock:
+                self.stats["verifier_lookups"] += 1
+                self._cache[digest] = (record, now + ttl)
+                self._cache.move_to_end(digest)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        if record is None:
+            with self._lock:
+                self.stats["rejected"] += 1
+            raise ApiKeyRejected(401, "invalid X-API-Key")
+        if consume:
+            self.consume(record)
+        return record
+
+    def consume(self, record: KeyRecord) -> None:
+        rate = record.rate_per_second or self.default_rate_per_second
+        if not rate:
+            return
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(record.tenant)
+            if bucket is None:
+                # A bucket smaller than one token could never admit a request.
+                capacity = max(record.burst or self.default_burst or rate, 1.0)
+                bucket = self._buckets[record.tenant] = TokenBucket(rate, capacity, now)
+                while len(self._buckets) > self.max_entries:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(record.tenant)
+            wait = bucket.try_acquire(now)
+            if wait:
+                self.stats["rate_limited"] += 1
+        if wait:
+            raise ApiKeyRejected(429, "rate limit exceeded", retry_after=wait)
+
+    def invalidate(self, api_key: str | None = None) -> None:
+        with self._lock:
+            if api_key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(hash_api_key(api_key), None)
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "verifier": type(self.verifier).__name__,
+                "verifier_error": getattr(self.verifier, "last_error", None),
+                "cached_keys": len(self._cache),
+                "rate_limited_tenants": len(self._buckets),
+                **self.stats,
+            }
+
+
+def verifier_from_spec(spec: str) -> KeyVerifier:
+    """``any``, ``file:/path/keys.json`` or ``sqlite:/path/keys.db``."""
+    kind, _, location = spec.partition(":")
+    if kind == "any":
+        return AllowAnyKeyVerifier()
+    if kind == "file" and location:
+        return FileKeyVerifier(Path(location))
+    if kind == "sqlite" and location:
+        return SqliteKeyVerifier(Path(location))
+    raise ValueError(f"unknown API key verifier {spec!r}")
+
+
+def _main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Provision gateway API keys")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    hash_command = subcommands.add_parser("hash", help="Print the key_sha256 value for a key file entry")
+    hash_command.add_argument("key")
+    add_command = subcommands.add_parser("add-sqlite", help="Add or replace a key in a SQLite key store")
+    add_command.add_argument("database", type=Path)
+    add_command.add_argument("key")
+    add_command.add_argument("--tenant", required=True)
+    add_command.add_argument("--rate-per-second", type=float)
+    add_command.add_argument("--burst", type=float)
+    args = parser.parse_args()
+
+    if args.command == "hash":
+        print(hash_api_key(args.key).hex())
+    else:
+        SqliteKeyVerifier(args.database).add(args.key, args.tenant, args.rate_per_second, args.burst)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
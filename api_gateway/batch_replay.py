@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import importlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Iterable, Sequence
+
+from api_gateway.deterministic_replay import (
+    DIGEST_MODES,
+    INTENT_ID_BITS,
+    JITTER_HIGH,
+    JITTER_LOW,
+    SPLITMIX64_GAMMA,
+    SPLITMIX64_MUL1,
+    SPLITMIX64_MUL2,
+    STATE_HASH_MUL,
+    STATE_HASH_ROOT,
+    _MASK64,
+    DeterministicNode,
+    ReplayEvent,
+    _as_events,
+    iter_event_log,
+)
+
+
+def _load_numpy() -> Any:
+    return importlib.import_module("numpy")
+
+
+def _splitmix64_array(np: Any, values: Any) -> Any:
+    values = values + np.uint64(SPLITMIX64_GAMMA)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(SPLITMIX64_MUL1)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(SPLITMIX64_MUL2)
+    return values ^ (values >> np.uint64(31))
+
+
+def _fold_state_word_array(np: Any, state_hash: Any, word: Any) -> Any:
+    state_hash = (state_hash ^ word) * np.uint64(STATE_HASH_MUL)
+    return state_hash ^ (state_hash >> np.uint64(32))
+
+
+class BatchReplayEngine:
+    """Steps one ``DeterministicNode(prng="counter")`` state machine per seed as NumPy arrays."""
+
+    def __init__(self, seeds: Sequence[int], digest_mode: str = "binary") -> None:
+        if digest_mode not in DIGEST_MODES:
+            raise ValueError(f"unknown digest mode {digest_mode!r}")
+        np = self._np = _load_numpy()
+        self.digest_mode = digest_mode
+        self.seeds = [int(seed) for seed in seeds]
+        # Mask like counter_prng_bits so seeds >= 2**63 (or negative) key the same stream as the scalar node.
+        self._keys = _splitmix64_array(np, np.asarray([seed & _MASK64 for seed in self.seeds], dtype=np.uint64))
+        self._counter = 0
+        self.energy = np.zeros(len(self.seeds), dtype=np.float64)
+        self.coherence = np.ones(len(self.seeds), dtype=np.float64)
+        self.last_intent = "idle"
+        self.ticks = 0
+        self._intent_ids: dict[str, int] = {"idle": 0}
+        self._state_hash = np.full(len(self.seeds), STATE_HASH_ROOT, dtype=np.uint64)
+
+    def apply(self, event: ReplayEvent) -> None:
+        np = self._np
+        bits = _splitmix64_array(np, self._keys ^ np.uint64(self._counter))
+        self._counter += 1
+        jitter = JITTER_LOW + (JITTER_HIGH - JITTER_LOW) * ((bits >> np.uint64(11)).astype(np.float64) * 2.0**-53)
+        signed = event.amplitude + jitter
+        # Same operation order as DeterministicNode.apply; "+ 0.0" folds -0.0 the way max(0.0, ...) does.
+        if event.event_type == "emotion":
+            self.energy = np.clip(self.energy + signed * 0.8, 0.0, 1.0) + 0.0
+            self.coherence = np.clip(self.coherence - np.abs(signed) * 0.25, 0.0, 1.0) + 0.0
+        elif event.event_type == "intent_switch":
+            self.coherence = np.clip(self.coherence - np.abs(signed) * 0.35, 0.0, 1.0) + 0.0
+            self.energy = np.clip(self.energy + np.abs(signed) * 0.2, 0.0, 1.0) + 0.0
+
+        self.ticks = event.tick
+        self.last_intent = event.intent
+        if self.digest_mode == "binary":
+            intent_id = self._intent_ids.setdefault(event.intent, len(self._intent_ids))
+            if intent_id >= 1 << INTENT_ID_BITS:
+                raise ValueError(f"binary digests support at most {1 << INTENT_ID_BITS} distinct intents")
+            tick_word = np.uint64(((event.tick << INTENT_ID_BITS) | intent_id) & ((1 << 64) - 1))
+            state_hash = _fold_state_word_array(np, self._state_hash, self.energy.view(np.uint64))
+            state_hash = _fold_state_word_array(np, state_hash, self.coherence.view(np.uint64))
+            self._state_hash = _fold_state_word_array(np, state_hash, tick_word)
+
+    def digests(self) -> list[str]:
+        if self.digest_mode == "binary":
+            return [f"{value:016x}" for value in _splitmix64_array(self._np, self._state_hash).tolist()]
+        return [
+            hashlib.sha256(
+                json.dumps(
+                    {"energy": energy, "coherence": coherence, "last_intent": self.last_intent, "ticks": self.ticks},
+                    sort_keys=True,
+                ).encode("utf-8")
+            ).hexdigest()
+            for energy, coherence in zip(self.energy.tolist(), self.coherence.tolist())
+        ]
+
+
+def replay_seeds_batched(
+    seeds: Sequence[int],
+    event_log: Iterable[dict[str, Any] | ReplayEvent],
+    digest_mode: str = "binary",
+) -> dict[str, Any]:
+    engine = BatchReplayEngine(seeds, digest_mode=digest_mode)
+    event_count = 0
+    for event in _as_events(event_log):
+        engine.apply(event)
+        event_count += 1
+    return {"seeds": engine.seeds, "digests": engine.digests(), "events": event_count}
+
+
+def replay_seeds_scalar(
+    seeds: Sequence[int],
+    event_log: Iterable[dict[str, Any] | ReplayEvent],
+    digest_mode: str = "binary",
+) -> dict[str, Any]:
+    events = list(_as_events(event_log))
+    digests = []
+    for seed in seeds:
+        node = DeterministicNode(seed=seed, prng="counter", digest_mode=digest_mode)
+        for event in events:
+            node.apply(event)
+        digests.append(node.digest())
+    return {"seeds": list(seeds), "digests": digests, "events": len(events)}
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Vectorized multi-seed replay (counter-based PRNG)")
+    parser.add_argument("--event-log", type=Path, required=True)
+    parser.add_argument("--seed-start", type=int, default=0)
+    parser.add_argument("--seed-count", type=int, default=1_000)
+    parser.add_argument("--digest-mode", choices=DIGEST_MODES, default="binary")
+    parser.add_argument("--compare-scalar", action="store_true", help="Also run the scalar path and compare digests")
+    return parser.parse_args()
+
+
+def _main() -> int:
+    args = _parse_args()
+    seeds = list(range(args.seed_start, args.seed_start + args.seed_count))
+    events = list(iter_event_log(args.event_log))
+
+    started = time.perf_counter()
+    batched = replay_seeds_batched(seeds, events, digest_mode=args.digest_mode)
+    batched_seconds = time.perf_counter() - started
+    report: dict[str, Any] = {
+        "seeds": len(seeds),
+        "events": batched["events"],
+        "batched": {"seconds": round(batched_seconds, 4), "seeds_per_sec": round(len(seeds) / batched_seconds, 1)},
+    }
+
+    matched = True
+    if args.compare_scalar:
+        started = time.perf_counter()
+        scalar = replay_seeds_scalar(seeds, events, digest_mode=args.digest_mode)
+        scalar_seconds = time.perf_counter() - started
+        matched = scalar["digests"] == batched["digests"]
+        report["scalar"] = {"seconds": round(scalar_seconds, 4), "seeds_per_sec": round(len(seeds) / scalar_seconds, 1)}
+        report["speedup"] = round(scalar_seconds / batched_seconds, 2)
+        report["digests_match"] = matched
+
+    print(json.dumps(report, indent=2))
+    return 0 if matched else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
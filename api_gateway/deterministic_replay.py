@@ -2,11 +2,31 @@ from __future__ import annotations
 
 import argparse
 import hashlib
+import itertools
 import json
+import os
 import random
+import struct
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator
+
+ROLLING_DIGEST_ROOT = "0" * 64
+JITTER_LOW = -0.02
+JITTER_HIGH = 0.02
+
+_MASK64 = (1 << 64) - 1
+SPLITMIX64_GAMMA = 0x9E3779B97F4A7C15
+SPLITMIX64_MUL1 = 0xBF58476D1CE4E5B9
+SPLITMIX64_MUL2 = 0x94D049BB133111EB
+
+DIGEST_MODES = ("binary", "json")
+STATE_LAYOUT = struct.Struct("<ddQ")  # energy, coherence, (ticks << INTENT_ID_BITS) | intent_id
+STATE_WORDS = struct.Struct("<QQQ")
+INTENT_ID_BITS = 20
+STATE_HASH_ROOT = 0x243F6A8885A308D3
+STATE_HASH_MUL = 0xFF51AFD7ED558CCD
 
 
 @dataclass(frozen=True)
@@ -17,8 +37,42 @@ class ReplayEvent:
     amplitude: float
 
 
+def splitmix64(value: int) -> int:
+    value = (value + SPLITMIX64_GAMMA) & _MASK64
+    value = ((value ^ (value >> 30)) * SPLITMIX64_MUL1) & _MASK64
+    value = ((value ^ (value >> 27)) * SPLITMIX64_MUL2) & _MASK64
+    return value ^ (value >> 31)
+
+
+def counter_uniform(seed: int, counter: int, low: float, high: float) -> float:
+    """Counter-based uniform draw: the ``counter``-th value for ``seed`` without any sequential state."""
+    bits = splitmix64(splitmix64(seed & _MASK64) ^ counter)
+    return low + (high - low) * ((bits >> 11) * 2.0**-53)
+
+
+def fold_state_word(state_hash: int, word: int) -> int:
+    state_hash = ((state_hash ^ word) * STATE_HASH_MUL) & _MASK64
+    return state_hash ^ (state_hash >> 32)
+
+
 class DeterministicNode:
-    def __init__(self, seed: int) -> None:
+    """Replay state machine.
+
+    ``digest_mode="binary"`` folds a fixed-layout record of the state (``STATE_LAYOUT``, with intents
+    interned to small integers in first-seen order) into a 64-bit hash after every tick, so ``digest()``
+    is O(1) and covers the whole trajectory. ``digest_mode="json"`` reproduces the original
+    ``sha256(json.dumps(state, sort_keys=True))`` digest of the final state for cross-version checks.
+    """
+
+    def __init__(self, seed: int, prng: str = "mt", digest_mode: str = "binary") -> None:
+        if prng not in {"mt", "counter"}:
+            raise ValueError(f"unknown prng {prng!r}")
+        if digest_mode not in DIGEST_MODES:
+            raise ValueError(f"unknown digest mode {digest_mode!r}")
+        self._seed = seed
+        self._prng = prng
+        self._digest_mode = digest_mode
+        self._counter = 0
         self._rng = random.Random(seed)
         self._state = {
             "energy": 0.0,
@@ -26,9 +80,15 @@ class DeterministicNode:
             "last_intent": "idle",
             "ticks": 0,
         }
+        self._intent_ids: dict[str, int] = {"idle": 0}
+        self._state_hash = STATE_HASH_ROOT
 
     def apply(self, event: ReplayEvent) -> None:
-        jitter = self._rng.uniform(-0.02, 0.02)
+        if self._prng == "counter":
+            jitter = counter_uniform(self._seed, self._counter, JITTER_LOW, JITTER_HIGH)
+            self._counter += 1
+        else:
+            jitter = self._rng.uniform(JITTER_LOW, JITTER_HIGH)
         signed = event.amplitude + jitter
         if event.event_type == "emotion":
             self._state["energy"] = max(0.0, min(1.0, self._state["energy"] + signed * 0.8))
@@ -39,17 +99,97 @@ class DeterministicNode:
 
         self._state["ticks"] = event.tick
         self._state["last_intent"] = event.intent
+        if self._digest_mode == "binary":
+            # Inlined fold_state_word over the three STATE_WORDS of encode_state(); this runs every tick.
+            energy_bits, coherence_bits, tick_word = STATE_WORDS.unpack(self.encode_state())
+            state_hash = ((self._state_hash ^ energy_bits) * STATE_HASH_MUL) & _MASK64
+            state_hash ^= state_hash >> 32
+            state_hash = ((state_hash ^ coherence_bits) * STATE_HASH_MUL) & _MASK64
+            state_hash ^= state_hash >> 32
+            state_hash = ((state_hash ^ tick_word) * STATE_HASH_MUL) & _MASK64
+            self._state_hash = state_hash ^ (state_hash >> 32)
+
+    def intent_id(self, intent: str) -> int:
+        intent_id = self._intent_ids.get(intent)
+        if intent_id is None:
+            intent_id = self._intent_ids[intent] = len(self._intent_ids)
+        return intent_id
+
+    def encode_state(self) -> bytes:
+        state = self._state
+        intent_id = self._intent_ids.get(state["last_intent"])
+        if intent_id is None:
+            intent_id = self.intent_id(state["last_intent"])
+        if intent_id >= 1 << INTENT_ID_BITS:
+            # It would spill into the tick bits and two different states could pack to the same word.
+            raise ValueError(f"binary digests support at most {1 << INTENT_ID_BITS} distinct intents")
+        packed_tick = ((state["ticks"] << INTENT_ID_BITS) | intent_id) & _MASK64
+        return STATE_LAYOUT.pack(state["energy"], state["coherence"], packed_tick)
 
     def digest(self) -> str:
+        if self._digest_mode == "binary":
+            return f"{splitmix64(self._state_hash):016x}"
         normalized = json.dumps(self._state, sort_keys=True)
         return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
+    def checkpoint(self) -> dict[str, Any]:
+        checkpoint: dict[str, Any] = {
+            "state": dict(self._state),
+            "intents": list(self._intent_ids),
+            "state_hash": self._state_hash,
+        }
+        if self._prng == "counter":
+            checkpoint["counter"] = self._counter
+        else:
+            version, internal, gauss_next = self._rng.getstate()
+            checkpoint["rng_state"] = [version, list(internal), gauss_next]
+        return checkpoint
+
+    def restore(self, checkpoint: dict[str, Any]) -> None:
+        if self._prng == "counter":
+            self._counter = checkpoint["counter"]
+        else:
+            version, internal, gauss_next = checkpoint["rng_state"]
+            self._rng.setstate((version, tuple(internal), gauss_next))
+        self._state = dict(checkpoint["state"])
+        self._intent_ids = {intent: idx for idx, intent in enumerate(checkpoint["intents"])}
+        self._state_hash = checkpoint["state_hash"]
 
-def replay_lockstep(seed: int, event_log: list[dict[str, Any]], node_count: int = 2) -> dict[str, Any]:
-    nodes = [DeterministicNode(seed=seed) for _ in range(node_count)]
-    events = [ReplayEvent(**row) for row in event_log]
 
-    for event in events:
+def iter_event_log(path: Path) -> Iterator[ReplayEvent]:
+    """Yield events from an NDJSON log one line at a time; legacy JSON-array logs are loaded whole."""
+    with path.open("r", encoding="utf-8") as handle:
+        head = handle.read(1)
+        while head.isspace():
+            head = handle.read(1)
+        if head == "[":
+            handle.seek(0)
+            for row in json.load(handle):
+                yield ReplayEvent(**row)
+            return
+
+        handle.seek(0)
+        for line in handle:
+            if line.strip():
+                yield ReplayEvent(**json.loads(line))
+
+
+def _as_events(event_log: Iterable[dict[str, Any] | ReplayEvent]) -> Iterator[ReplayEvent]:
+    for row in event_log:
+        yield row if isinstance(row, ReplayEvent) else ReplayEvent(**row)
+
+
+def replay_lockstep(
+    seed: int,
+    event_log: Iterable[dict[str, Any] | ReplayEvent],
+    node_count: int = 2,
+    digest_mode: str = "binary",
+) -> dict[str, Any]:
+    nodes = [DeterministicNode(seed=seed, digest_mode=digest_mode) for _ in range(node_count)]
+    event_count = 0
+
+    for event in _as_events(event_log):
+        event_count += 1
         for node in nodes:
             node.apply(event)
 
@@ -58,7 +198,172 @@ def replay_lockstep(seed: int, event_log: list[dict[str, Any]], node_count: int
         "seed": seed,
         "digests": digests,
         "lockstep": len(set(digests)) == 1,
-        "events": len(events),
+        "events": event_count,
+    }
+
+
+def _roll_digest(previous: str, digest: str) -> str:
+    return hashlib.sha256(f"{previous}{digest}".encode("utf-8")).hexdigest()
+
+
+def _bisect_divergence(
+    nodes: list[DeterministicNode],
+    checkpoint: dict[str, Any],
+    window: list[ReplayEvent],
+) -> dict[str, Any]:
+    """Binary-search ``window`` for the first event after which node digests disagree.
+
+    Assumes nodes agree at ``checkpoint`` and, once diverged, stay diverged.
+    """
+
+    def digests_after(count: int) -> list[str]:
+        for node in nodes:
+            node.restore(checkpoint["node"])
+        for event in window[:count]:
+            for node in nodes:
+                node.apply(event)
+        return [node.digest() for node in nodes]
+
+    low, high, probes = 0, len(window), 0
+    while high - low > 1:
+        middle = (low + high) // 2
+        probes += 1
+        if len(set(digests_after(middle))) == 1:
+            low = middle
+        else:
+            high = middle
+
+    digests = digests_after(high)
+    return {
+        "tick": window[high - 1].tick,
+        "event_index": checkpoint["event_index"] + high - 1,
+        "checkpoint_event_index": checkpoint["event_index"],
+        "bisection_probes": probes,
+        "digests": digests,
+    }
+
+
+def replay_with_checkpoints(
+    seed: int,
+    event_log: Iterable[dict[str, Any] | ReplayEvent],
+    node_count: int = 2,
+    checkpoint_interval: int = 1_000,
+    resume_from: dict[str, Any] | None = None,
+    checkpoint_dir: Path | None = None,
+    node_factory: Callable[[int], DeterministicNode] | None = None,
+    digest_mode: str = "binary",
+) -> dict[str, Any]:
+    """Lockstep replay with rolling digests every ``checkpoint_interval`` events.
+
+    On a digest mismatch, replay stops and bisects from the last matching checkpoint to the first
+    divergent tick. ``resume_from`` takes a checkpoint (as written to ``checkpoint_dir``) and skips
+    the events it already covers.
+    """
+    if checkpoint_interval < 1:
+        raise ValueError(f"checkpoint_interval must be at least 1, got {checkpoint_interval}")
+    if node_factory is None:
+        nodes = [DeterministicNode(seed=seed, digest_mode=digest_mode) for _ in range(node_count)]
+    else:
+        nodes = [node_factory(seed) for _ in range(node_count)]
+    events = _as_events(event_log)
+    event_index = 0
+    rolling = ROLLING_DIGEST_ROOT
+    if resume_from is not None:
+        for node in nodes:
+            node.restore(resume_from["node"])
+        event_index = resume_from["event_index"]
+        rolling = resume_from["rolling_digest"]
+        events = itertools.islice(events, event_index, None)
+
+    last_checkpoint = resume_from or {
+        "event_index": event_index,
+        "tick": 0,
+        "rolling_digest": rolling,
+        "node": nodes[0].checkpoint(),
+    }
+    rolling_digests = [rolling] * node_count
+    window: list[ReplayEvent] = []
+    checkpoints_written = 0
+    divergence: dict[str, Any] | None = None
+
+    def close_window() -> bool:
+        nonlocal last_checkpoint, rolling_digests, window, checkpoints_written, divergence
+        digests = [node.digest() for node in nodes]
+        rolling_digests = [_roll_digest(previous, digest) for previous, digest in zip(rolling_digests, digests)]
+        if len(set(digests)) != 1:
+            divergence = _bisect_divergence(nodes, last_checkpoint, window)
+            return False
+
+        last_checkpoint = {
+            "event_index": event_index,
+            "tick": window[-1].tick,
+            "rolling_digest": rolling_digests[0],
+            "node": nodes[0].checkpoint(),
+        }
+        window = []
+        if checkpoint_dir is not None:
+            checkpoint_dir.mkdir(parents=True, exist_ok=True)
+            checkpoint_path = checkpoint_dir / f"checkpoint-{event_index:012d}.json"
+            checkpoint_path.write_text(json.dumps(last_checkpoint), encoding="utf-8")
+            checkpoints_written += 1
+        return True
+
+    for event in events:
+        for node in nodes:
+            node.apply(event)
+        window.append(event)
+        event_index += 1
+        if event_index % checkpoint_interval == 0 and not close_window():
+            break
+    else:
+        if window:
+            close_window()
+
+    digests = [node.digest() for node in nodes]
+    return {
+        "seed": seed,
+        "digests": digests,
+        "lockstep": divergence is None,
+        "events": event_index,
+        "checkpoint_interval": checkpoint_interval,
+        "checkpoints_written": checkpoints_written,
+        "last_checkpoint_event_index": last_checkpoint["event_index"],
+        "rolling_digests": rolling_digests,
+        "resumed_from_event_index": resume_from["event_index"] if resume_from else None,
+        "divergence": divergence,
+    }
+
+
+def _replay_single_node(seed: int, event_log_path: str, digest_mode: str) -> tuple[str, int]:
+    node = DeterministicNode(seed=seed, digest_mode=digest_mode)
+    event_count = 0
+    for event in iter_event_log(Path(event_log_path)):
+        node.apply(event)
+        event_count += 1
+    return node.digest(), event_count
+
+
+def replay_lockstep_parallel(
+    seed: int,
+    event_log_path: Path,
+    node_count: int = 2,
+    workers: int | None = None,
+    digest_mode: str = "binary",
+) -> dict[str, Any]:
+    """Replay each node in its own process, every one streaming the log independently."""
+    max_workers = min(node_count, workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_replay_single_node, seed, str(event_log_path), digest_mode) for _ in range(node_count)]
+        results = [future.result() for future in futures]
+
+    digests = [digest for digest, _ in results]
+    event_counts = {count for _, count in results}
+    return {
+        "seed": seed,
+        "digests": digests,
+        "lockstep": len(set(digests)) == 1 and len(event_counts) == 1,
+        "events": max(event_counts, default=0),
+        "workers": max_workers,
     }
 
 
@@ -67,15 +372,55 @@ def _parse_args() -> argparse.Namespace:
     parser.add_argument("--seed", type=int, required=True)
     parser.add_argument("--event-log", type=Path, required=True)
     parser.add_argument("--nodes", type=int, default=2)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes to spread nodes across; 1 replays in-process, 0 uses one per node up to the CPU count",
+    )
+    parser.add_argument(
+        "--digest-mode",
+        choices=DIGEST_MODES,
+        default="binary",
+        help="binary: incremental per-tick state hash; json: original sha256 of the final JSON state",
+    )
+    parser.add_argument("--checkpoint-interval", type=int, help="Compare rolling digests every N events")
+    parser.add_argument("--checkpoint-dir", type=Path, help="Write matching checkpoints as JSON files here")
+    parser.add_argument("--resume-from", type=Path, help="Checkpoint file to resume replay from")
     return parser.parse_args()
 
 
 def _main() -> int:
     args = _parse_args()
-    with args.event_log.open("r", encoding="utf-8") as handle:
-        payload = json.load(handle)
-
-    result = replay_lockstep(seed=args.seed, event_log=payload, node_count=args.nodes)
+    if args.checkpoint_interval is not None or args.resume_from:
+        resume_from = None
+        if args.resume_from:
+            with args.resume_from.open("r", encoding="utf-8") as handle:
+                resume_from = json.load(handle)
+        result = replay_with_checkpoints(
+            seed=args.seed,
+            event_log=iter_event_log(args.event_log),
+            node_count=args.nodes,
+            checkpoint_interval=1_000 if args.checkpoint_interval is None else args.checkpoint_interval,
+            resume_from=resume_from,
+            checkpoint_dir=args.checkpoint_dir,
+            digest_mode=args.digest_mode,
+        )
+    elif args.workers == 1:
+        result = replay_lockstep(
+            seed=args.seed,
+            event_log=iter_event_log(args.event_log),
+            node_count=args.nodes,
+            digest_mode=args.digest_mode,
+        )
+    else:
+        result = replay_lockstep_parallel(
+            seed=args.seed,
+            event_log_path=args.event_log,
+            node_count=args.nodes,
+            workers=args.workers or None,
+            digest_mode=args.digest_mode,
+        )
     print(json.dumps(result, indent=2))
     return 0 if result["lockstep"] else 1
 
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+DEFAULT_GRAPH_PATH = Path(__file__).resolve().parents[1] / "data" / "production_anonymized" / "intent_light_graph.sample.json"
+
+
+class IntentLightIndex:
+    """Immutable source -> edges lookup; each source's edges are pre-sorted so top-k is a slice."""
+
+    def __init__(
+        self,
+        edges_by_source: dict[str, tuple[dict[str, Any], ...]],
+        k_anonymity_threshold: int | None = None,
+    ) -> None:
+        self._edges_by_source = edges_by_source
+        self.k_anonymity_threshold = k_anonymity_threshold
+        self.edge_count = sum(len(edges) for edges in edges_by_source.values())
+
+    @classmethod
+    def from_graph(cls, graph: dict[str, Any]) -> "IntentLightIndex":
+        grouped: dict[str, list[dict[str, Any]]] = {}
+        for edge in graph.get("edges", []):
+            grouped.setdefault(edge["source"], []).append(
+                {
+                    "target": edge["target"],
+                    "count": edge["count"],
+                    "avg_confidence": edge["avg_confidence"],
+                    "calibration_weight": edge["calibration_weight"],
+                }
+            )
+        edges_by_source = {
+            source: tuple(sorted(edges, key=lambda item: (-item["calibration_weight"], item["target"])))
+            for source, edges in grouped.items()
+        }
+        return cls(edges_by_source, graph.get("privacy", {}).get("k_anonymity_threshold"))
+
+    @property
+    def sources(self) -> list[str]:
+        return sorted(self._edges_by_source)
+
+    def top_k(self, source: str, k: int) -> list[dict[str, Any]]:
+        return list(self._edges_by_source.get(source, ())[:k])
+
+
+class IntentLightIndexStore:
+    """Holds the current index and swaps in a rebuilt one when the graph file's mtime or size changes."""
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_GRAPH_PATH,
+        check_interval_seconds: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = Path(path)
+        self.check_interval_seconds = check_interval_seconds
+        self._clock = clock
+        self._index = IntentLightIndex({})
+        self._signature: tuple[int, int] | None = None
+        self._next_check = float("-inf")
+        self.generation = 0
+        self.last_error: str | None = None
+        # Suggest runs in the threadpool and startup may warm the index in a worker thread.
+        self._reload_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "IntentLightIndexStore":
+        return cls(
+            path=Path(os.getenv("AGNS_INTENT_LIGHT_GRAPH", str(DEFAULT_GRAPH_PATH))),
+            check_interval_seconds=float(os.getenv("AGNS_INTENT_LIGHT_RELOAD_SECONDS", "1.0")),
+        )
+
+    def get(self) -> IntentLightIndex:
+        now = self._clock()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval_seconds
+            self.reload_if_changed()
+        return self._index
+
+    def reload_if_changed(self) -> bool:
+        with self._reload_lock:
+            return self._reload_if_changed()
+
+    def _reload_if_changed(self) -> bool:
+        try:
+            stat = self.path.stat()
+        except OSError as exc:
+            self.last_error = str(exc)
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return False
+        try:
+            with self.path.open("r", encoding="utf-8") as handle:
+                index = IntentLightIndex.from_graph(json.load(handle))
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            # Keep serving the previous index while the file is mid-write or malformed.
+            self.last_error = str(exc)
+            return False
+        self._index = index
+        self._signature = signature
+        self.generation += 1
+        self.last_error = None
+        return True
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "generation": self.generation,
+            "sources": len(self._index.sources),
+            "edges": self._index.edge_count,
+            "k_anonymity_threshold": self._index.k_anonymity_threshold,
+            "last_error": self.last_error,
+        }
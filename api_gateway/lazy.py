@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class LazyValue(Generic[T]):
+    """Builds its value on the first ``get()`` instead of at import time.
+
+    Sync routes run in the threadpool, so the first concurrent callers are serialized on a lock to
+    make sure only one instance is ever built; later calls return without locking.
+    """
+
+    __slots__ = ("_factory", "_value", "_built", "_lock")
+
+    def __init__(self, factory: Callable[[], T]) -> None:
+        self._factory = factory
+        self._value: T | None = None
+        self._built = False
+        self._lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def get(self) -> T:
+        if self._built:
+            return self._value  # type: ignore[return-value]
+        with self._lock:
+            if not self._built:
+                self._value = self._factory()
+                self._built = True
+        return self._value  # type: ignore[return-value]
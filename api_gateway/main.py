@@ -1,15 +1,72 @@
 from __future__ import annotations
 
+import asyncio
+import hmac
+import os
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 from statistics import mean
-from typing import Any, Literal
+from typing import TYPE_CHECKING, Any, AsyncIterator, Hashable, Literal
 from urllib.parse import urlparse
-from urllib.request import Request, urlopen
 
-from fastapi import FastAPI, Header, HTTPException, Query, WebSocket, WebSocketDisconnect
-from pydantic import BaseModel, Field
-
-app = FastAPI(title="AGNS Cognitive DSL Gateway", version="1.0.0")
+from fastapi import FastAPI, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, Field, ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from api_gateway.api_keys import ApiKeyAuthenticator, ApiKeyRejected, KeyRecord
+from api_gateway.intent_light_index import IntentLightIndexStore
+from api_gateway.lazy import LazyValue
+from api_gateway.response_encoding import json_fragment, json_response, model_fragment
+from api_gateway.runtime_profiler import ProfilerBusy, ProfilingMiddleware, RuntimeProfiler
+from api_gateway.speculative_validation import SpeculativeValidationCache
+from api_gateway.state_sync import RoomCapacityError, StateSyncRoom, StateSyncRoomRegistry
+from api_gateway.voice_routing import VoiceRoutingStore
+from api_gateway.ws_codec import accept_with_codec, broadcast, send_message
+
+if TYPE_CHECKING:
+    from api_gateway.proxy_client import AsyncProxyClient
+
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    if PROFILER.enabled:
+        PROFILER.instrument(_app.routes)
+        await PROFILER.start()
+    room_sweeper = asyncio.create_task(_sweep_idle_rooms())
+    try:
+        if EAGER_STARTUP:
+            _load_lookup_tables()
+            _STATE_SYNC_ROOMS.get()
+            _PROXY_CLIENT.get()
+            yield
+            return
+        # Start serving right away and build the lookup tables in a worker thread; a request that
+        # arrives first waits on the store's reload lock rather than seeing an empty table.
+        warm_tables = asyncio.create_task(asyncio.to_thread(_load_lookup_tables))
+        try:
+            yield
+        finally:
+            await warm_tables
+    finally:
+        room_sweeper.cancel()
+        if _PROXY_CLIENT.built:
+            await _PROXY_CLIENT.get().aclose()
+        await PROFILER.stop()
+
+
+async def _sweep_idle_rooms() -> None:
+    # Lookups sweep too, but a gateway with no room traffic would otherwise keep idle rooms forever.
+    while True:
+        await asyncio.sleep(ROOM_SWEEP_INTERVAL_SECONDS)
+        if _STATE_SYNC_ROOMS.built:
+            _STATE_SYNC_ROOMS.get().sweep()
+
+
+PROFILER = RuntimeProfiler.from_env()
+PROFILE_SNAPSHOT_MAX_MS = 30_000
+app = FastAPI(title="AGNS Cognitive DSL Gateway", version="1.0.0", lifespan=_lifespan)
+if PROFILER.enabled:
+    app.add_middleware(ProfilingMiddleware, profiler=PROFILER)
 
 
 FIRMA_CONSTRAINTS = {
@@ -21,6 +78,8 @@ FIRMA_CONSTRAINTS = {
     }
 }
 
+WS_MAX_IN_FLIGHT_SUBMISSIONS = 64
+
 
 class IntentVector(BaseModel):
     category: str
@@ -75,6 +134,35 @@ class ValidationResult(BaseModel):
     validator_version: str = "firma-validator-2.1"
 
 
+class IPWPrediction(BaseModel):
+    action_id: str
+    p: float = Field(ge=0.0, le=1.0)
+
+
+class IPWProbabilityPolicy(BaseModel):
+    requires_normalization: bool
+    epsilon: float = Field(ge=0.0, le=0.01)
+    on_violation: Literal["error", "normalize"]
+
+
+class IntentProbabilityWave(BaseModel):
+    ipw_type: Literal["IPW_V1"]
+    predictions: list[IPWPrediction] = Field(min_length=1)
+    collapse_threshold: float = Field(ge=0.0, le=1.0)
+    probability_policy: IPWProbabilityPolicy
+    evidence: dict[str, Any]
+
+
+class SpeculativeEmitRequest(BaseModel):
+    session_id: str
+    ipw: IntentProbabilityWave
+    candidates: dict[str, VisualManifestation]
+    top_k: int = Field(default=3, ge=1, le=16)
+
+
+SUCCESS_VALIDATION_FRAGMENT = json_fragment(ValidationResult(status="success", violations=[]).model_dump())
+
+
 class Metrics(BaseModel):
     total_dsl_submissions: int = 0
     successful_renders: int = 0
@@ -84,13 +172,16 @@ class Metrics(BaseModel):
 METRICS = Metrics()
 TELEMETRY_TS_DB: dict[str, list[dict[str, Any]]] = {}
 
-VOICE_MODEL_MAP: dict[tuple[str, str], str] = {
-    ("th", "apac"): "whisper-thai-pro",
-    ("en", "us"): "whisper-english-us",
-    ("en", "eu"): "whisper-english-eu",
-    ("ja", "apac"): "whisper-japanese-pro",
-    ("es", "latam"): "whisper-spanish-latam",
-}
+VOICE_BATCH_MAX = 1_000
+
+
+class VoiceRouteQuery(BaseModel):
+    language: str = Field(max_length=64)
+    region: str = Field(max_length=32)
+
+
+class VoiceRouteBatchRequest(BaseModel):
+    queries: list[VoiceRouteQuery] = Field(min_length=1, max_length=VOICE_BATCH_MAX)
 
 
 class TelemetryPoint(BaseModel):
@@ -104,38 +195,55 @@ class TelemetryIngestRequest(BaseModel):
     points: list[TelemetryPoint]
 
 
-class StateSyncRoom:
-    def __init__(self) -> None:
-        self.version = 0
-        self.shared_state: dict[str, Any] = {}
-        self.user_states: dict[str, dict[str, Any]] = {}
-        self.clients: list[WebSocket] = []
-
-    def apply_delta(self, delta: dict[str, Any], user_id: str | None, user_delta: dict[str, Any]) -> dict[str, Any]:
-        self.version += 1
-        self.shared_state.update(delta)
-        if user_id and user_delta:
-            current = self.user_states.setdefault(user_id, {})
-            current.update(user_delta)
-        return self.snapshot(user_id)
-
-    def snapshot(self, user_id: str | None) -> dict[str, Any]:
-        return {
-            "version": self.version,
-            "shared_state": self.shared_state,
-            "user_state": self.user_states.get(user_id or "", {}),
-        }
+def _build_proxy_client() -> "AsyncProxyClient":
+    from api_gateway.proxy_client import AsyncProxyClient
+
+    return AsyncProxyClient()
+
+
+EAGER_STARTUP = os.getenv("AGNS_EAGER_STARTUP", "0") == "1"
+ROOM_SWEEP_INTERVAL_SECONDS = float(os.getenv("AGNS_ROOM_SWEEP_INTERVAL_SECONDS", "30"))
+_STATE_SYNC_ROOMS: LazyValue[StateSyncRoomRegistry] = LazyValue(StateSyncRoomRegistry.from_env)
+_PROXY_CLIENT: LazyValue["AsyncProxyClient"] = LazyValue(_build_proxy_client)
+_LAZY_GLOBALS: dict[str, LazyValue[Any]] = {"STATE_SYNC_ROOMS": _STATE_SYNC_ROOMS, "PROXY_CLIENT": _PROXY_CLIENT}
+INTENT_LIGHT_INDEX = IntentLightIndexStore.from_env()
+INTENT_LIGHT_MAX_K = 50
+VOICE_ROUTING = VoiceRoutingStore.from_env()
+API_KEYS = ApiKeyAuthenticator.from_env()
+ADMIN_TOKEN = os.getenv("AGNS_ADMIN_TOKEN") or None
+
 
+def _load_lookup_tables() -> None:
+    INTENT_LIGHT_INDEX.reload_if_changed()
+    VOICE_ROUTING.reload_if_changed()
 
-STATE_SYNC_ROOMS: dict[str, StateSyncRoom] = {}
+
+def __getattr__(name: str) -> Any:
+    # ``main.STATE_SYNC_ROOMS`` and ``main.PROXY_CLIENT`` still resolve, but are only built on first use.
+    lazy = _LAZY_GLOBALS.get(name)
+    if lazy is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return lazy.get()
 
 
 class FirmaValidator:
     @staticmethod
     def validate_dsl_response(payload: CognitiveEmitRequest) -> tuple[bool, list[str]]:
-        violations: list[str] = []
-        visual = payload.model_response.visual_manifestation
+        return FirmaValidator.validate_manifestation(payload.model_response.visual_manifestation)
+
+    @staticmethod
+    def speculative_key(visual: VisualManifestation) -> Hashable:
+        # Every field validate_manifestation reads; keep the two in step.
+        return (
+            visual.color_palette.primary.upper(),
+            visual.emergency_override,
+            visual.particle_physics.particle_count,
+            visual.device_tier,
+        )
 
+    @staticmethod
+    def validate_manifestation(visual: VisualManifestation) -> tuple[bool, list[str]]:
+        violations: list[str] = []
         if visual.color_palette.primary.upper() == "#DC143C" and not visual.emergency_override:
             violations.append("ห้ามใช้สีแดงเลือดหมู #DC143C")
 
@@ -148,9 +256,23 @@ class FirmaValidator:
         return len(violations) == 0, violations
 
 
-def _ensure_api_key(x_api_key: str | None) -> None:
-    if not x_api_key:
-        raise HTTPException(status_code=401, detail="missing X-API-Key")
+SPECULATIVE_VALIDATION = SpeculativeValidationCache.from_env(
+    validate=FirmaValidator.validate_manifestation,
+    key=FirmaValidator.speculative_key,
+)
+
+
+def _ensure_api_key(x_api_key: str | None) -> KeyRecord:
+    try:
+        return API_KEYS.authenticate(x_api_key)
+    except ApiKeyRejected as exc:
+        headers = {"Retry-After": str(max(1, round(exc.retry_after)))} if exc.retry_after else None
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail, headers=headers) from exc
+
+
+async def _ensure_api_key_off_loop(x_api_key: str | None) -> KeyRecord:
+    # A cache miss may read the key file or SQLite store; keep that blocking I/O off the event loop.
+    return await run_in_threadpool(_ensure_api_key, x_api_key)
 
 
 def _extract_ws_api_key(websocket: WebSocket) -> str | None:
@@ -160,6 +282,51 @@ def _extract_ws_api_key(websocket: WebSocket) -> str | None:
     return websocket.query_params.get("api_key")
 
 
+def _ensure_admin(x_admin_token: str | None) -> None:
+    # Operational endpoints stay closed until AGNS_ADMIN_TOKEN is configured.
+    if not ADMIN_TOKEN or not x_admin_token or not hmac.compare_digest(
+        x_admin_token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")
+    ):
+        raise HTTPException(status_code=403, detail="invalid X-Admin-Token")
+
+
+def _ensure_profiler_admin(x_admin_token: str | None) -> None:
+    if not PROFILER.enabled:
+        raise HTTPException(status_code=404, detail="profiling is disabled")
+    if not PROFILER.check_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="invalid X-Admin-Token")
+
+
+def _record_validation(passed: bool) -> None:
+    METRICS.total_dsl_submissions += 1
+    if passed:
+        METRICS.successful_renders += 1
+    else:
+        METRICS.validation_failures += 1
+
+
+def _validate_stream_submission(seq: Any, submission: Any) -> tuple[dict[str, Any], bool | None]:
+    try:
+        request = CognitiveEmitRequest.model_validate(submission)
+    except ValidationError as exc:
+        errors = [
+            f"{'.'.join(str(part) for part in error['loc']) or '<root>'}: {error['msg']}"
+            for error in exc.errors(include_url=False)
+        ]
+        return {"type": "dsl_result", "seq": seq, "status": "rejected", "errors": errors}, None
+
+    passed, violations = FirmaValidator.validate_dsl_response(request)
+    result = {
+        "type": "dsl_result",
+        "seq": seq,
+        "status": "success" if passed else "failed",
+        "trace_id": request.model_response.trace_id,
+    }
+    if violations:
+        result["violations"] = violations
+    return result, passed
+
+
 def _metrics_snapshot() -> dict[str, Any]:
     total = METRICS.total_dsl_submissions
     compliance = 100.0 if total == 0 else round((1 - (METRICS.validation_failures / total)) * 100, 2)
@@ -176,15 +343,26 @@ def _metrics_snapshot() -> dict[str, Any]:
 
 
 def _resolve_voice_model(language: str, region: str) -> str:
-    language_key = language.split("-")[0].lower()
-    region_key = region.lower()
-    return VOICE_MODEL_MAP.get((language_key, region_key), f"whisper-general-{language_key}")
+    return VOICE_ROUTING.get().resolve(language, region)
+
+
+def _ranked_predictions(ipw: IntentProbabilityWave) -> list[tuple[str, float]]:
+    """Applies the wave's probability policy and ranks predictions by probability, then action id."""
+    predictions = [(prediction.action_id, prediction.p) for prediction in ipw.predictions]
+    policy = ipw.probability_policy
+    if policy.requires_normalization:
+        total = sum(p for _, p in predictions)
+        if total == 0:
+            raise HTTPException(status_code=422, detail="ipw probability sum is 0, cannot normalize")
+        if abs(total - 1.0) > policy.epsilon:
+            if policy.on_violation == "error":
+                raise HTTPException(status_code=422, detail=f"ipw probability sum {total:.6f} is outside epsilon")
+            predictions = [(action_id, p / total) for action_id, p in predictions]
+    return sorted(predictions, key=lambda item: (-item[1], item[0]))
 
 
 def _room(room_id: str) -> StateSyncRoom:
-    if room_id not in STATE_SYNC_ROOMS:
-        STATE_SYNC_ROOMS[room_id] = StateSyncRoom()
-    return STATE_SYNC_ROOMS[room_id]
+    return _STATE_SYNC_ROOMS.get().get(room_id)
 
 
 @app.post("/api/v1/cognitive/emit")
@@ -193,39 +371,49 @@ def emit_cognitive_dsl(
     x_api_key: str | None = Header(default=None, alias="X-API-Key"),
     x_model_provider: str | None = Header(default=None, alias="X-Model-Provider"),
     x_model_version: str | None = Header(default=None, alias="X-Model-Version"),
-) -> dict[str, Any]:
+    compact: bool = False,
+) -> Response:
     _ensure_api_key(x_api_key)
     if not x_model_provider or not x_model_version:
         raise HTTPException(status_code=400, detail="missing model provider/version headers")
 
-    METRICS.total_dsl_submissions += 1
-    passed, violations = FirmaValidator.validate_dsl_response(request)
+    passed, violations, speculative_hit = SPECULATIVE_VALIDATION.resolve(
+        request.session_id,
+        request.model_response.visual_manifestation,
+    )
+    _record_validation(passed)
     if not passed:
-        METRICS.validation_failures += 1
-        return {
-            "status": "failed",
-            "validation": ValidationResult(status="failed", violations=violations).model_dump(),
-            "metrics": _metrics_snapshot(),
-        }
+        return json_response(
+            {
+                "status": "failed",
+                "validation": ValidationResult(status="failed", violations=violations).model_dump(),
+                "metrics": {"speculative_hit": speculative_hit, **_metrics_snapshot()},
+            }
+        )
 
-    METRICS.successful_renders += 1
     processing_time_ms = 89
-    return {
-        "status": "success",
-        "data": {
-            "session_id": request.session_id,
-            "trace_id": request.model_response.trace_id,
-            "cognitive_dsl": request.model_response.model_dump(),
-            "model_provider": x_model_provider,
-            "model_version": x_model_version,
-        },
-        "validation": ValidationResult(status="success", violations=[]).model_dump(),
-        "metrics": {
-            "processing_time_ms": processing_time_ms,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            **_metrics_snapshot(),
-        },
+    data: dict[str, Any] = {
+        "session_id": request.session_id,
+        "trace_id": request.model_response.trace_id,
     }
+    if not compact:
+        # Echo the parsed response straight from pydantic-core instead of dumping it to dicts first.
+        data["cognitive_dsl"] = model_fragment(request.model_response)
+    data["model_provider"] = x_model_provider
+    data["model_version"] = x_model_version
+    return json_response(
+        {
+            "status": "success",
+            "data": data,
+            "validation": SUCCESS_VALIDATION_FRAGMENT,
+            "metrics": {
+                "processing_time_ms": processing_time_ms,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "speculative_hit": speculative_hit,
+                **_metrics_snapshot(),
+            },
+        }
+    )
 
 
 @app.post("/api/v1/cognitive/validate")
@@ -241,6 +429,49 @@ def validate_cognitive_dsl(
     ).model_dump()
 
 
+@app.post("/api/v1/cognitive/speculate")
+def speculate_cognitive_dsl(
+    request: SpeculativeEmitRequest,
+    x_api_key: str | None = Header(default=None, alias="X-API-Key"),
+) -> dict[str, Any]:
+    """Pre-validates the top-k predicted manifestations so a matching emit can skip validation."""
+    _ensure_api_key(x_api_key)
+    ranked = _ranked_predictions(request.ipw)
+    ghosts = []
+    unmatched = []
+    for action_id, probability in ranked:
+        if len(ghosts) == request.top_k:
+            break
+        candidate = request.candidates.get(action_id)
+        if candidate is None:
+            unmatched.append(action_id)
+            continue
+        passed, violations = SPECULATIVE_VALIDATION.prepare(request.session_id, candidate)
+        ghosts.append(
+            {
+                "action_id": action_id,
+                "p": round(probability, 6),
+                "ghost_flag": True,
+                "validation": ValidationResult(
+                    status="success" if passed else "failed",
+                    violations=violations,
+                ).model_dump(),
+            }
+        )
+    return {
+        "session_id": request.session_id,
+        "collapsed": ranked[0][1] >= request.ipw.collapse_threshold,
+        "ghosts": ghosts,
+        "unmatched_predictions": unmatched,
+    }
+
+
+@app.get("/api/v1/cognitive/speculate/stats")
+def speculative_validation_stats(x_api_key: str | None = Header(default=None, alias="X-API-Key")) -> dict[str, Any]:
+    _ensure_api_key(x_api_key)
+    return SPECULATIVE_VALIDATION.stats()
+
+
 @app.get("/health")
 def health_check() -> dict[str, Any]:
     return {
@@ -259,26 +490,22 @@ def health_check() -> dict[str, Any]:
 
 
 @app.get("/api/v1/proxy/fetch")
-def proxy_fetch_url(
+async def proxy_fetch_url(
     url: str = Query(..., min_length=8, max_length=2048),
+    strip_html: bool = False,
     x_api_key: str | None = Header(default=None, alias="X-API-Key"),
 ) -> dict[str, Any]:
-    _ensure_api_key(x_api_key)
+    await _ensure_api_key_off_loop(x_api_key)
     parsed = urlparse(url)
     if parsed.scheme not in {"http", "https"}:
         raise HTTPException(status_code=400, detail="url must be http/https")
 
-    req = Request(url, headers={"User-Agent": "AetheriumProxy/1.0"})
+    # Imported here so the proxy module (and its HTML parser) stays out of gateway startup.
+    from api_gateway.proxy_client import ProxyFetchError
+
     try:
-        with urlopen(req, timeout=6) as response:
-            text = response.read(120_000).decode("utf-8", errors="ignore")
-            return {
-                "status": "success",
-                "url": url,
-                "content_length": len(text),
-                "snippet": " ".join(text.split())[:1200],
-            }
-    except Exception as exc:  # pragma: no cover - network variance
+        return await _PROXY_CLIENT.get().fetch(url, strip_html=strip_html)
+    except ProxyFetchError as exc:  # pragma: no cover - network variance
         raise HTTPException(status_code=502, detail=f"proxy fetch failed: {exc}") from exc
 
 
@@ -326,70 +553,200 @@ def query_telemetry(
     }
 
 
+@app.get("/api/v1/state-sync/stats")
+def state_sync_stats(x_api_key: str | None = Header(default=None, alias="X-API-Key")) -> dict[str, Any]:
+    _ensure_api_key(x_api_key)
+    return _STATE_SYNC_ROOMS.get().stats()
+
+
+@app.get("/api/v1/intent-light/suggest")
+def suggest_light_patterns(
+    intent: str = Query(..., min_length=1, max_length=128),
+    k: int = Query(default=3, ge=1, le=INTENT_LIGHT_MAX_K),
+    x_api_key: str | None = Header(default=None, alias="X-API-Key"),
+) -> dict[str, Any]:
+    _ensure_api_key(x_api_key)
+    index = INTENT_LIGHT_INDEX.get()
+    return {
+        "intent": intent,
+        "k": k,
+        "suggestions": index.top_k(intent, k),
+        "generation": INTENT_LIGHT_INDEX.generation,
+    }
+
+
+@app.get("/api/v1/intent-light/stats")
+def intent_light_stats(x_api_key: str | None = Header(default=None, alias="X-API-Key")) -> dict[str, Any]:
+    _ensure_api_key(x_api_key)
+    INTENT_LIGHT_INDEX.get()
+    return INTENT_LIGHT_INDEX.stats()
+
+
 @app.get("/api/v1/voice/model")
 def resolve_voice_model(language: str = "en-US", region: str = "us") -> dict[str, Any]:
     model = _resolve_voice_model(language=language, region=region)
     return {"language": language, "region": region, "model": model}
 
 
+@app.post("/api/v1/voice/model/batch")
+def resolve_voice_models(request: VoiceRouteBatchRequest) -> dict[str, Any]:
+    table = VOICE_ROUTING.get()
+    results = []
+    for query in request.queries:
+        model, matched = table.route(query.language, query.region)
+        results.append({"language": query.language, "region": query.region, "model": model, "matched": matched})
+    return {"generation": VOICE_ROUTING.generation, "results": results}
+
+
+@app.post("/api/v1/voice/routing/reload")
+def reload_voice_routing(
+    x_api_key: str | None = Header(default=None, alias="X-API-Key"),
+    x_admin_token: str | None = Header(default=None, alias="X-Admin-Token"),
+) -> dict[str, Any]:
+    _ensure_api_key(x_api_key)
+    _ensure_admin(x_admin_token)
+    reloaded = VOICE_ROUTING.reload_if_changed(force=True)
+    return {"reloaded": reloaded, **VOICE_ROUTING.stats()}
+
+
+@app.get("/api/v1/voice/routing/stats")
+def voice_routing_stats(x_api_key: str | None = Header(default=None, alias="X-API-Key")) -> dict[str, Any]:
+    _ensure_api_key(x_api_key)
+    VOICE_ROUTING.get()
+    return VOICE_ROUTING.stats()
+
+
+@app.get("/api/v1/auth/stats")
+def api_key_stats(
+    x_api_key: str | None = Header(default=None, alias="X-API-Key"),
+    x_admin_token: str | None = Header(default=None, alias="X-Admin-Token"),
+) -> dict[str, Any]:
+    _ensure_api_key(x_api_key)
+    _ensure_admin(x_admin_token)
+    return API_KEYS.snapshot()
+
+
+@app.get("/api/v1/admin/profile")
+def runtime_profile(
+    reset: bool = False,
+    x_api_key: str | None = Header(default=None, alias="X-API-Key"),
+    x_admin_token: str | None = Header(default=None, alias="X-Admin-Token"),
+) -> dict[str, Any]:
+    _ensure_api_key(x_api_key)
+    _ensure_profiler_admin(x_admin_token)
+    return PROFILER.report(reset=reset)
+
+
+@app.post("/api/v1/admin/profile/snapshot")
+async def runtime_profile_snapshot(
+    duration_ms: int = Query(default=1_000, ge=10, le=PROFILE_SNAPSHOT_MAX_MS),
+    interval_ms: float = Query(default=5.0, ge=1.0, le=1_000.0),
+    top: int = Query(default=25, ge=1, le=200),
+    x_api_key: str | None = Header(default=None, alias="X-API-Key"),
+    x_admin_token: str | None = Header(default=None, alias="X-Admin-Token"),
+) -> dict[str, Any]:
+    await _ensure_api_key_off_loop(x_api_key)
+    _ensure_profiler_admin(x_admin_token)
+    try:
+        # A dedicated thread, so sampling neither blocks the loop nor holds a request worker.
+        return await asyncio.to_thread(PROFILER.snapshot, duration_ms / 1000, interval_ms / 1000, top)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+
+
 @app.websocket("/ws/cognitive-stream")
 async def cognitive_stream(websocket: WebSocket) -> None:
-    api_key = _extract_ws_api_key(websocket)
-    if not api_key:
+    try:
+        # The connection itself is free; every submission below takes a token from the key's bucket.
+        key_record = await run_in_threadpool(API_KEYS.authenticate, _extract_ws_api_key(websocket), False)
+    except ApiKeyRejected as exc:
         await websocket.accept()
         await websocket.send_json(
             {
                 "status": "failed",
-                "detail": "missing X-API-Key",
-                "code": 401,
+                "detail": exc.detail,
+                "code": exc.status_code,
             }
         )
-        await websocket.close(code=1008, reason="missing X-API-Key")
+        await websocket.close(code=1008, reason=exc.detail)
         return
 
-    await websocket.accept()
+    codec = await accept_with_codec(websocket)
+    in_flight = asyncio.Semaphore(WS_MAX_IN_FLIGHT_SUBMISSIONS)
+    send_lock = asyncio.Lock()
+    pending: set[asyncio.Task[None]] = set()
+
+    async def reply(message: dict[str, Any]) -> None:
+        async with send_lock:
+            await send_message(websocket, message)
+
+    async def process(seq: Any, submission: Any) -> None:
+        try:
+            result, passed = await run_in_threadpool(_validate_stream_submission, seq, submission)
+            if passed is not None:
+                _record_validation(passed)
+            try:
+                await reply(result)
+            except (WebSocketDisconnect, RuntimeError):
+                # The client left while this submission was validating; the receive loop handles the close.
+                return
+        finally:
+            in_flight.release()
+
     try:
         while True:
-            payload = await websocket.receive_json()
-            message_type = payload.get("type")
-            if message_type != "dsl_submission":
-                await websocket.send_json({"status": "failed", "detail": "invalid message type"})
+            payload = await codec.receive(websocket)
+            seq = payload.get("seq")
+            if payload.get("type") != "dsl_submission":
+                await reply({"status": "failed", "detail": "invalid message type", "seq": seq})
+                continue
+            try:
+                API_KEYS.consume(key_record)
+            except ApiKeyRejected as exc:
+                await reply(
+                    {
+                        "status": "rate_limited",
+                        "detail": exc.detail,
+                        "code": exc.status_code,
+                        "retry_after": round(exc.retry_after or 0, 3),
+                        "seq": seq,
+                    }
+                )
                 continue
 
-            await websocket.send_json(
-                {
-                    "status": "accepted",
-                    "received_at": datetime.now(timezone.utc).isoformat(),
-                    "echo": payload,
-                }
-            )
+            await in_flight.acquire()
+            task = asyncio.create_task(process(seq, payload.get("submission")))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
     except WebSocketDisconnect:
         return
+    finally:
+        for task in list(pending):
+            task.cancel()
 
 
 @app.websocket("/ws/state-sync/{room_id}")
 async def state_sync(websocket: WebSocket, room_id: str) -> None:
     room = _room(room_id)
     user_id = websocket.query_params.get("user_id")
-    await websocket.accept()
-    room.clients.append(websocket)
-    await websocket.send_json({"type": "state_snapshot", **room.snapshot(user_id)})
+    codec = await accept_with_codec(websocket)
+    room.join(websocket, user_id)
+    await send_message(websocket, {"type": "state_snapshot", **room.snapshot(user_id)})
     try:
         while True:
-            payload = await websocket.receive_json()
+            payload = await codec.receive(websocket)
             if payload.get("type") != "patch_state":
-                await websocket.send_json({"type": "error", "detail": "unsupported message type"})
+                await send_message(websocket, {"type": "error", "detail": "unsupported message type"})
                 continue
             delta = payload.get("delta", {})
             user_delta = payload.get("user_delta", {})
-            snapshot = room.apply_delta(delta=delta, user_id=user_id, user_delta=user_delta)
+            try:
+                snapshot = room.apply_delta(delta=delta, user_id=user_id, user_delta=user_delta)
+            except RoomCapacityError as exc:
+                await send_message(websocket, {"type": "error", "detail": str(exc)})
+                continue
             message = {"type": "state_updated", **snapshot}
-            for client in list(room.clients):
-                try:
-                    await client.send_json(message)
-                except Exception:
-                    if client in room.clients:
-                        room.clients.remove(client)
+            for client in await broadcast(list(room.clients), message):
+                room.leave(client)
     except WebSocketDisconnect:
-        if websocket in room.clients:
-            room.clients.remove(websocket)
+        room.leave(websocket)
@@ -0,0 +1,387 @@
+from __future__ import annotations
+
+import asyncio
+import codecs
+import contextlib
+import importlib
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Any, AsyncIterator, Callable, Iterable
+from urllib.parse import urlparse
+
+PROXY_USER_AGENT = "AetheriumProxy/1.0"
+PROXY_MAX_BYTES = 120_000
+PROXY_SNIPPET_CHARS = 1_200
+
+_NON_SPACE = re.compile(r"\S+")
+_SKIPPED_HTML_TAGS = frozenset({"script", "style", "noscript", "template", "head"})
+_BLOCK_HTML_TAGS = frozenset(
+    {
+        "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "footer",
+        "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre",
+        "section", "table", "td", "th", "title", "tr", "ul",
+    }
+)
+
+
+class ProxyFetchError(RuntimeError):
+    pass
+
+
+def _load_httpx() -> Any:
+    return importlib.import_module("httpx")
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    result: dict[str, Any]
+    etag: str | None
+    last_modified: str | None
+    expires_at: float
+
+
+def _parse_cache_control(value: str | None) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip('"') if arg else None
+    return directives
+
+
+def _freshness_seconds(directives: dict[str, str | None], default_ttl: float) -> float | None:
+    """Seconds the response may be served without revalidation, or ``None`` if it must not be stored."""
+    if "no-store" in directives or "private" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                return max(0.0, float(directives[name] or 0))
+            except ValueError:
+                return 0.0
+    return default_ttl
+
+
+class _HTMLTextStripper(HTMLParser):
+    def __init__(self, sink: "SnippetExtractor") -> None:
+        super().__init__(convert_charrefs=True)
+        self._sink = sink
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag in _SKIPPED_HTML_TAGS:
+            self._skip_depth += 1
+        elif tag in _BLOCK_HTML_TAGS:
+            self._sink.break_word()
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIPPED_HTML_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_HTML_TAGS:
+            self._sink.break_word()
+
+    def handle_data(self, data: str) -> None:
+        if not self._skip_depth:
+            self._sink.feed_text(data)
+
+
+class SnippetExtractor:
+    """Builds ``" ".join(text.split())[:max_chars]`` incrementally and stops as soon as the budget is filled."""
+
+    def __init__(self, max_chars: int = PROXY_SNIPPET_CHARS, strip_html: bool = False) -> None:
+        self.max_chars = max_chars
+        self.bytes_read = 0
+        self.chars_decoded = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self._parts: list[str] = []
+        self._length = 0
+        self._pending_space = False
+        self._html = _HTMLTextStripper(self) if strip_html else None
+
+    @property
+    def done(self) -> bool:
+        return self._length >= self.max_chars
+
+    def feed(self, chunk: bytes) -> bool:
+        self.bytes_read += len(chunk)
+        self._feed_decoded(self._decoder.decode(chunk))
+        return self.done
+
+    def break_word(self) -> None:
+        self._pending_space = True
+
+    def feed_text(self, text: str) -> None:
+        if self.done:
+            return
+        prev_end = 0
+        for match in _NON_SPACE.finditer(text):
+            if match.start() > prev_end:
+                self._pending_space = True
+            if self._pending_space and self._parts:
+                self._append(" ")
+            self._pending_space = False
+            self._append(match.group())
+            prev_end = match.end()
+            if self.done:
+                return
+        if prev_end < len(text):
+            self._pending_space = True
+
+    def snippet(self) -> str:
+        return "".join(self._parts)
+
+    def close(self) -> str:
+        if not self.done:
+            self._feed_decoded(self._decoder.decode(b"", final=True))
+            if self._html is not None:
+                self._html.close()
+        return self.snippet()
+
+    def _feed_decoded(self, text: str) -> None:
+        self.chars_decoded += len(text)
+        if self._html is not None:
+            self._html.feed(text)
+        else:
+            self.feed_text(text)
+
+    def _append(self, text: str) -> None:
+        remaining = self.max_chars - self._length
+        if remaining <= 0:
+            return
+        if len(text) > remaining:
+            text = text[:remaining]
+        self._parts.append(text)
+        self._length += len(text)
+
+
+def summarize_chunks(
+    url: str,
+    chunks: Iterable[bytes],
+    strip_html: bool = False,
+    max_bytes: int = PROXY_MAX_BYTES,
+) -> dict[str, Any]:
+    extractor = SnippetExtractor(strip_html=strip_html)
+    for chunk in chunks:
+        if _feed_limited(extractor, chunk, max_bytes):
+            break
+    return _summary(url, extractor, max_bytes)
+
+
+def _feed_limited(extractor: SnippetExtractor, chunk: bytes, max_bytes: int) -> bool:
+    remaining = max_bytes - extractor.bytes_read
+    return extractor.feed(chunk[:remaining]) or extractor.bytes_read >= max_bytes
+
+
+def _summary(url: str, extractor: SnippetExtractor, max_bytes: int) -> dict[str, Any]:
+    truncated = extractor.done or extractor.bytes_read >= max_bytes
+    snippet = extractor.close()
+    return {
+        "status": "success",
+        "url": url,
+        "content_length": extractor.chars_decoded,
+        "bytes_read": extractor.bytes_read,
+        "truncated": truncated,
+        "snippet": snippet,
+    }
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class _HostLimit:
+    __slots__ = ("semaphore", "users")
+
+    def __init__(self, limit: int) -> None:
+        self.semaphore = asyncio.Semaphore(limit)
+        self.users = 0
+
+
+class AsyncProxyClient:
+    def __init__(
+        self,
+        timeout_seconds: float = 6.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        per_host_limit: int = 8,
+        max_tracked_hosts: int = 1_024,
+        cache_entries: int = 256,
+        default_ttl_seconds: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.timeout_seconds = timeout_seconds
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.per_host_limit = per_host_limit
+        self.max_tracked_hosts = max_tracked_hosts
+        self.default_ttl_seconds = default_ttl_seconds
+        self.cache = ResponseCache(cache_entries)
+        self._clock = clock
+        self._client: Any | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._host_limits: OrderedDict[str, _HostLimit] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task[dict[str, Any]]] = {}
+        self.stats = {"requests": 0, "cache_hits": 0, "revalidated": 0, "coalesced": 0, "upstream_fetches": 0}
+
+    async def fetch(self, url: str, strip_html: bool = False) -> dict[str, Any]:
+        await self._bind_loop()
+        self.stats["requests"] += 1
+        key = f"text:{url}" if strip_html else url
+        cached = self.cache.get(key)
+        if cached is not None and cached.expires_at > self._clock():
+            self.stats["cache_hits"] += 1
+            return {**cached.result, "cache": "hit"}
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            return {**await asyncio.shield(task), "cache": "coalesced"}
+
+        task = asyncio.create_task(self._fetch_upstream(url, key, strip_html, cached))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _task: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._client is not None:
+            return
+        # Pooled connections and semaphores belong to the loop that created them.
+        httpx = _load_httpx()
+        previous, previous_loop = self._client, self._loop
+        self._loop = loop
+        self._host_limits = OrderedDict()
+        self._inflight = {}
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout_seconds,
+            follow_redirects=True,
+            headers={"User-Agent": PROXY_USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+            ),
+        )
+        if previous is not None:
+            await self._close_stale_client(previous, previous_loop)
+
+    @staticmethod
+    async def _close_stale_client(client: Any, loop: asyncio.AbstractEventLoop | None) -> None:
+        if loop is not None and loop.is_running():
+            # Still serving on another thread: close the pool on the loop that owns its sockets.
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        try:
+            await client.aclose()
+        except RuntimeError:
+            # Its loop is already closed; the pool is marked closed and the sockets go with the transports.
+            pass
+
+    @contextlib.asynccontextmanager
+    async def _host_slot(self, url: str) -> AsyncIterator[None]:
+        host = urlparse(url).netloc.lower()
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = self._host_limits[host] = _HostLimit(self.per_host_limit)
+        else:
+            self._host_limits.move_to_end(host)
+        limit.users += 1
+        self._evict_idle_hosts()
+        try:
+            async with limit.semaphore:
+                yield
+        finally:
+            limit.users -= 1
+
+    def _evict_idle_hosts(self) -> None:
+        # Only hosts nobody is using or waiting on can go; a busy host keeps its semaphore so the
+        # per-host limit still holds. Oldest first, so the table stays bounded by recent hosts.
+        overflow = len(self._host_limits) - self.max_tracked_hosts
+        if overflow <= 0:
+            return
+        idle: list[str] = []
+        for host, limit in self._host_limits.items():
+            if limit.users == 0:
+                idle.append(host)
+                if len(idle) == overflow:
+                    break
+        for host in idle:
+            del self._host_limits[host]
+
+    async def _fetch_upstream(
+        self,
+        url: str,
+        key: str,
+        strip_html: bool,
+        cached: CachedResponse | None,
+    ) -> dict[str, Any]:
+        headers: dict[str, str] = {}
+        if cached is not None and cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached is not None and cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+
+        assert self._client is not None
+        async with self._host_slot(url):
+            self.stats["upstream_fetches"] += 1
+            try:
+                async with self._client.stream("GET", url, headers=headers) as response:
+                    if response.status_code == 304 and cached is not None:
+                        self.stats["revalidated"] += 1
+                        self._store(key, cached.result, response.headers, cached)
+                        return {**cached.result, "cache": "revalidated"}
+                    if response.status_code >= 400:
+                        raise ProxyFetchError(f"HTTP Error {response.status_code}: {response.reason_phrase}")
+                    extractor = SnippetExtractor(strip_html=strip_html)
+                    async for chunk in response.aiter_bytes():
+                        if _feed_limited(extractor, chunk, PROXY_MAX_BYTES):
+                            break
+            except ProxyFetchError:
+                raise
+            except Exception as exc:
+                raise ProxyFetchError(str(exc) or exc.__class__.__name__) from exc
+
+        result = _summary(url, extractor, PROXY_MAX_BYTES)
+        self._store(key, result, response.headers, None)
+        return {**result, "cache": "miss"}
+
+    def _store(self, key: str, result: dict[str, Any], headers: Any, previous: CachedResponse | None) -> None:
+        ttl = _freshness_seconds(_parse_cache_control(headers.get("cache-control")), self.default_ttl_seconds)
+        etag = headers.get("etag") or (previous.etag if previous else None)
+        last_modified = headers.get("last-modified") or (previous.last_modified if previous else None)
+        if ttl is None or (ttl <= 0 and not etag and not last_modified):
+            self.cache.discard(key)
+            return
+        self.cache.put(
+            key,
+            CachedResponse(result=result, etag=etag, last_modified=last_modified, expires_at=self._clock() + ttl),
+        )
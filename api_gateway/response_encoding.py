@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import functools
+import importlib
+import importlib.util
+import json
+from typing import Any
+
+import pydantic_core
+from fastapi import Response
+from pydantic import BaseModel
+
+
+@functools.lru_cache(maxsize=None)
+def _load_msgspec() -> Any | None:
+    if importlib.util.find_spec("msgspec") is None:
+        return None
+    return importlib.import_module("msgspec")
+
+
+def encode_json(payload: Any) -> bytes:
+    # Same JSON values either way, but msgspec spells exponent floats as 1e-7/1e16 where json writes 1e-07/1e+16.
+    msgspec = _load_msgspec()
+    if msgspec is not None:
+        return msgspec.json.encode(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_fragment(payload: Any) -> Any:
+    """Encodes ``payload`` once so it can be embedded verbatim in later ``encode_json`` calls."""
+    msgspec = _load_msgspec()
+    if msgspec is not None:
+        return msgspec.Raw(encode_json(payload))
+    return payload
+
+
+def model_fragment(model: BaseModel) -> Any:
+    """A validated model as an embeddable fragment, serialized by pydantic-core without a dict round trip."""
+    msgspec = _load_msgspec()
+    if msgspec is not None:
+        return msgspec.Raw(pydantic_core.to_json(model))
+    return model.model_dump(mode="json")
+
+
+def json_response(payload: Any, status_code: int = 200) -> Response:
+    # Already bytes, so FastAPI skips its response-model validation and jsonable_encoder pass.
+    return Response(content=encode_json(payload), status_code=status_code, media_type="application/json")
@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import hmac
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Generator, Iterable
+
+DEFAULT_LAG_INTERVAL_SECONDS = 0.1
+DEFAULT_WINDOW = 600
+MAX_STACK_DEPTH = 64
+# Leaf frames in these stdlib files mean the thread is parked, not working.
+_IDLE_FILES = frozenset({"selectors.py", "threading.py", "queue.py"})
+
+# perf_counter() at which the current request reached the gateway; copied into threadpool workers.
+_REQUEST_STARTED: contextvars.ContextVar[float | None] = contextvars.ContextVar("request_started", default=None)
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+class _RouteStats:
+    __slots__ = ("executor", "calls", "wall_total", "wall_max", "cpu_total", "wait_total", "wait_max", "timed")
+
+    def __init__(self, executor: str) -> None:
+        self.executor = executor
+        self.calls = 0
+        self.wall_total = 0.0
+        self.wall_max = 0.0
+        self.cpu_total = 0.0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timed = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        calls = max(self.calls, 1)
+        timed = max(self.timed, 1)
+        return {
+            "executor": self.executor,
+            "calls": self.calls,
+            "wall_ms_mean": round(self.wall_total / calls * 1000, 3),
+            "wall_ms_max": round(self.wall_max * 1000, 3),
+            "cpu_ms_mean": round(self.cpu_total / timed * 1000, 3),
+            "cpu_share": round(self.cpu_total / self.wall_total, 3) if self.wall_total else 0.0,
+            "wait_ms_mean": round(self.wait_total / timed * 1000, 3),
+            "wait_ms_max": round(self.wait_max * 1000, 3),
+        }
+
+
+class _CpuTimedCoroutine:
+    """Drives a coroutine and adds up the thread CPU of each step, excluding time spent suspended."""
+
+    __slots__ = ("_coro", "cpu")
+
+    def __init__(self, coro: Any) -> None:
+        self._coro = coro
+        self.cpu = 0.0
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        value: Any = None
+        error: BaseException | None = None
+        while True:
+            started = time.thread_time()
+            try:
+                yielded = self._coro.throw(error) if error is not None else self._coro.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.cpu += time.thread_time() - started
+            try:
+                value, error = (yield yielded), None
+            except BaseException as exc:  # noqa: BLE001 - forwarded into the wrapped coroutine
+                value, error = None, exc
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    # Nearest rank, as in tools/benchmarks; api_gateway does not import from tools.
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _thread_roles(loop_thread_id: int | None) -> dict[int, str]:
+    roles = {}
+    for thread in threading.enumerate():
+        if thread.ident == loop_thread_id:
+            roles[thread.ident] = "event_loop"
+        elif thread.name.startswith("AnyIO worker thread"):
+            roles[thread.ident] = "threadpool"
+        elif thread.ident is not None:
+            roles[thread.ident] = thread.name
+    return roles
+
+
+def _frame_label(frame: Any) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_name}"
+
+
+class RuntimeProfiler:
+    """Opt-in view of where the gateway spends time: event-loop lag, threadpool pressure and per-route cost.
+
+    Disabled by default; nothing is wrapped or sampled unless ``AGNS_PROFILING=1``.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        admin_token: str | None = None,
+        lag_interval_seconds: float = DEFAULT_LAG_INTERVAL_SECONDS,
+        window: int = DEFAULT_WINDOW,
+    ) -> None:
+        self.enabled = enabled
+        self.admin_token = admin_token
+        self.lag_interval_seconds = lag_interval_seconds
+        self._lag: deque[float] = deque(maxlen=window)
+        # (borrowed tokens, total tokens, tasks waiting) per tick of the lag monitor.
+        self._threadpool: deque[tuple[int, int, int]] = deque(maxlen=window)
+        self._routes: dict[str, _RouteStats] = {}
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self._monitor: asyncio.Task[None] | None = None
+        self.loop_thread_id: int | None = None
+
+    @classmethod
+    def from_env(cls) -> "RuntimeProfiler":
+        return cls(
+            enabled=os.getenv("AGNS_PROFILING", "0") == "1",
+            admin_token=os.getenv("AGNS_PROFILING_ADMIN_TOKEN") or None,
+            lag_interval_seconds=float(os.getenv("AGNS_PROFILING_LAG_INTERVAL_MS", "100")) / 1000,
+        )
+
+    def check_admin_token(self, token: str | None) -> bool:
+        if not self.admin_token or not token:
+            return False
+        return hmac.compare_digest(token.encode("utf-8"), self.admin_token.encode("utf-8"))
+
+    def _route(self, key: str, executor: str) -> _RouteStats:
+        stats = self._routes.get(key)
+        if stats is None:
+            stats = self._routes.setdefault(key, _RouteStats(executor))
+        return stats
+
+    def record_wall(self, key: str, executor: str, wall: float) -> None:
+        with self._lock:
+            stats = self._route(key, executor)
+            stats.calls += 1
+            stats.wall_total += wall
+            stats.wall_max = max(stats.wall_max, wall)
+
+    def record_handler(self, key: str, executor: str, cpu: float, wait: float) -> None:
+        with self._lock:
+            stats = self._route(key, executor)
+            stats.timed += 1
+            stats.cpu_total += cpu
+            stats.wait_total += wait
+            stats.wait_max = max(stats.wait_max, wait)
+
+    def _wrap(self, key: str, call: Callable[..., Any]) -> Callable[..., Any]:
+        if asyncio.iscoroutinefunction(call):
+
+            @functools.wraps(call)
+            async def timed_async(*args: Any, **kwargs: Any) -> Any:
+                started = time.perf_counter()
+                request_started = _REQUEST_STARTED.get()
+                step = _CpuTimedCoroutine(call(*args, **kwargs))
+                try:
+                    return await step
+                finally:
+                    wait = started - request_started if request_started is not None else 0.0
+                    self.record_handler(key, "event_loop", step.cpu, wait)
+
+            return timed_async
+
+        @functools.wraps(call)
+        def timed_sync(*args: Any, **kwargs: Any) -> Any:
+            # Runs in a threadpool worker; the request start time arrives through the copied context.
+            started = time.perf_counter()
+            request_started = _REQUEST_STARTED.get()
+            cpu_started = time.thread_time()
+            try:
+                return call(*args, **kwargs)
+            finally:
+                wait = started - request_started if request_started is not None else 0.0
+                self.record_handler(key, "threadpool", time.thread_time() - cpu_started, wait)
+
+        return timed_sync
+
+    def instrument(self, routes: Iterable[Any]) -> int:
+        """Wraps each FastAPI endpoint to measure handler CPU; returns how many were wrapped."""
+        wrapped = 0
+        for route in routes:
+            dependant = getattr(route, "dependant", None)
+            if dependant is None or dependant.call is None or getattr(dependant.call, "__profiled__", False):
+                continue
+            key = _route_key(route)
+            dependant.call = self._wrap(key, dependant.call)
+            dependant.call.__profiled__ = True
+            wrapped += 1
+        return wrapped
+
+    async def start(self) -> None:
+        if self._monitor is None:
+            self.loop_thread_id = threading.get_ident()
+            self._monitor = asyncio.create_task(self._watch_loop())
+
+    async def stop(self) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+            try:
+                await self._monitor
+            except asyncio.CancelledError:
+                pass
+            self._monitor = None
+
+    async def _watch_loop(self) -> None:
+        import anyio.to_thread
+
+        loop = asyncio.get_running_loop()
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        while True:
+            expected = loop.time() + self.lag_interval_seconds
+            await asyncio.sleep(self.lag_interval_seconds)
+            # Anything past the requested wake-up is time the loop spent running something else.
+            self._lag.append(max(0.0, loop.time() - expected))
+            statistics = limiter.statistics()
+            self._threadpool.append(
+                (statistics.borrowed_tokens, int(statistics.total_tokens), statistics.tasks_waiting)
+            )
+
+    def report(self, reset: bool = False) -> dict[str, Any]:
+        lag = sorted(self._lag)
+        pool = list(self._threadpool)
+        with self._lock:
+            routes = {key: stats.as_dict() for key, stats in sorted(self._routes.items())}
+            if reset:
+                self._routes.clear()
+        if reset:
+            self._lag.clear()
+            self._threadpool.clear()
+        busy = [borrowed / total for borrowed, total, _ in pool if total]
+        waiting = [queued for _, _, queued in pool]
+        return {
+            "enabled": self.enabled,
+            "monitoring": self._monitor is not None,
+            "event_loop_lag_ms": {
+                "samples": len(lag),
+                "interval_ms": round(self.lag_interval_seconds * 1000, 3),
+                "p50": round(_percentile(lag, 0.50) * 1000, 3),
+                "p99": round(_percentile(lag, 0.99) * 1000, 3),
+                "max": round(lag[-1] * 1000, 3) if lag else 0.0,
+            },
+            "threadpool": {
+                "samples": len(pool),
+                "total_workers": pool[-1][1] if pool else None,
+                "busy_workers": pool[-1][0] if pool else None,
+                "utilization_mean": round(sum(busy) / len(busy), 3) if busy else 0.0,
+                "utilization_max": round(max(busy), 3) if busy else 0.0,
+                "queue_depth": pool[-1][2] if pool else None,
+                "queue_depth_mean": round(sum(waiting) / len(waiting), 3) if waiting else 0.0,
+                "queue_depth_max": max(waiting, default=0),
+            },
+            "routes": routes,
+        }
+
+    def snapshot(self, duration_seconds: float, interval_seconds: float, top: int = 25) -> dict[str, Any]:
+        """Samples every thread's stack with ``sys._current_frames()`` and aggregates folded stacks.
+
+        Blocks the calling thread for ``duration_seconds``; only one snapshot runs at a time.
+        """
+        if not self._snapshot_lock.acquire(blocking=False):
+            raise ProfilerBusy("a profiling snapshot is already running")
+        try:
+            sampler_id = threading.get_ident()
+            roles = _thread_roles(self.loop_thread_id)
+            stacks: Counter[str] = Counter()
+            leaves: Counter[str] = Counter()
+            busy: Counter[str] = Counter()
+            idle: Counter[str] = Counter()
+            rounds = 0
+            deadline = time.perf_counter() + duration_seconds
+            while time.perf_counter() < deadline:
+                rounds += 1
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == sampler_id:
+                        continue
+                    role = roles.get(thread_id)
+                    if role is None:
+                        roles = _thread_roles(self.loop_thread_id)
+                        role = roles.get(thread_id, f"thread-{thread_id}")
+                    if Path(frame.f_code.co_filename).name in _IDLE_FILES:
+                        idle[role] += 1
+                        continue
+                    labels = []
+                    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+                        labels.append(_frame_label(frame))
+                        frame = frame.f_back
+                    busy[role] += 1
+                    leaves[f"{role};{labels[0]}"] += 1
+                    stacks[";".join([role, *reversed(labels)])] += 1
+                time.sleep(interval_seconds)
+            return {
+                "duration_ms": round(duration_seconds * 1000, 3),
+                "interval_ms": round(interval_seconds * 1000, 3),
+                "rounds": rounds,
+                "busy_samples": dict(busy),
+                "idle_samples": dict(idle),
+                "top_functions": [{"frame": frame, "samples": count} for frame, count in leaves.most_common(top)],
+                # Folded-stack lines ("role;outer;...;leaf count") load directly into flamegraph tools.
+                "folded_stacks": [f"{stack} {count}" for stack, count in stacks.most_common(top)],
+            }
+        finally:
+            self._snapshot_lock.release()
+
+
+def _route_key(route: Any) -> str:
+    methods = getattr(route, "methods", None)
+    if methods:
+        return f"{','.join(sorted(methods))} {route.path}"
+    return f"WS {route.path}"
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware recording wall time per matched route (connection lifetime for WebSockets)."""
+
+    def __init__(self, app: Callable[..., Awaitable[None]], profiler: RuntimeProfiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        token = _REQUEST_STARTED.set(started)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _REQUEST_STARTED.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                is_async = asyncio.iscoroutinefunction(getattr(route, "endpoint", None))
+                executor = "event_loop" if is_async else "threadpool"
+                self.profiler.record_wall(_route_key(route), executor, time.perf_counter() - started)
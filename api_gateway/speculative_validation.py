@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+DEFAULT_MAX_ENTRIES = 4_096
+
+
+class SpeculativeValidationCache:
+    """Validation outcomes computed ahead of the emit they predict ("ghost" results).
+
+    Entries are keyed by session and by the fields the validator actually reads, so any real
+    request that agrees with a prediction on those fields can reuse the speculative outcome.
+    """
+
+    def __init__(
+        self,
+        validate: Callable[[Any], tuple[bool, list[str]]],
+        key: Callable[[Any], Hashable],
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self._validate = validate
+        self._key = key
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, Hashable], tuple[bool, tuple[str, ...], float]] = OrderedDict()
+        # Emit handlers run in the threadpool, so lookups and inserts can race.
+        self._lock = threading.Lock()
+        self.prepared = 0
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+    @classmethod
+    def from_env(
+        cls,
+        validate: Callable[[Any], tuple[bool, list[str]]],
+        key: Callable[[Any], Hashable],
+    ) -> "SpeculativeValidationCache":
+        return cls(
+            validate=validate,
+            key=key,
+            max_entries=int(os.getenv("AGNS_SPECULATIVE_CACHE_SIZE", str(DEFAULT_MAX_ENTRIES))),
+        )
+
+    def prepare(self, session_id: str, manifestation: Any) -> tuple[bool, list[str]]:
+        cache_key = (session_id, self._key(manifestation))
+        started = self._clock()
+        passed, violations = self._validate(manifestation)
+        cost = self._clock() - started
+        with self._lock:
+            self._entries[cache_key] = (passed, tuple(violations), cost)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.prepared += 1
+        return passed, violations
+
+    def resolve(self, session_id: str, manifestation: Any) -> tuple[bool, list[str], bool]:
+        """Returns ``(passed, violations, hit)``; a miss validates inline and is not cached."""
+        cache_key = (session_id, self._key(manifestation))
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                self.saved_seconds += entry[2]
+            else:
+                self.misses += 1
+        if entry is not None:
+            return entry[0], list(entry[1]), True
+        passed, violations = self._validate(manifestation)
+        return passed, violations, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.prepared = self.hits = self.misses = 0
+            self.saved_seconds = 0.0
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "prepared": self.prepared,
+            "lookups": lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "latency_saved_ms": round(self.saved_seconds * 1000, 3),
+        }
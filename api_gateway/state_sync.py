@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+
+class RoomCapacityError(ValueError):
+    pass
+
+
+def _encoded_size(key: str, value: Any) -> int:
+    encoded = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+    return len(key.encode("utf-8")) + len(encoded.encode("utf-8"))
+
+
+def _compact_update(target: dict[str, Any], sizes: dict[str, int], delta: dict[str, Any]) -> int:
+    change = 0
+    for key, value in delta.items():
+        change -= sizes.pop(key, 0)
+        if value is None:
+            target.pop(key, None)
+            continue
+        target[key] = value
+        sizes[key] = _encoded_size(key, value)
+        change += sizes[key]
+    return change
+
+
+class StateSyncRoom:
+    def __init__(
+        self,
+        max_bytes: int | None = None,
+        user_state_ttl_seconds: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.version = 0
+        self.shared_state: dict[str, Any] = {}
+        self.user_states: dict[str, dict[str, Any]] = {}
+        self.clients: list[Any] = []
+        self.max_bytes = max_bytes
+        self.user_state_ttl_seconds = user_state_ttl_seconds
+        self._clock = clock
+        self.last_active = clock()
+        self._shared_sizes: dict[str, int] = {}
+        self._user_sizes: dict[str, dict[str, int]] = {}
+        self._user_last_seen: dict[str, float] = {}
+        self._connected_users: dict[str, int] = {}
+        self._client_users: dict[Any, str | None] = {}
+        self.byte_size = 0
+
+    def join(self, client: Any, user_id: str | None) -> None:
+        self.clients.append(client)
+        self._client_users[client] = user_id
+        self.touch(user_id)
+        if user_id:
+            self._connected_users[user_id] = self._connected_users.get(user_id, 0) + 1
+
+    def leave(self, client: Any) -> None:
+        if client in self.clients:
+            self.clients.remove(client)
+        user_id = self._client_users.pop(client, None)
+        self.touch(user_id)
+        if user_id and user_id in self._connected_users:
+            self._connected_users[user_id] -= 1
+            if self._connected_users[user_id] <= 0:
+                del self._connected_users[user_id]
+
+    def touch(self, user_id: str | None = None) -> None:
+        now = self._clock()
+        self.last_active = now
+        if user_id:
+            self._user_last_seen[user_id] = now
+
+    def apply_delta(self, delta: dict[str, Any], user_id: str | None, user_delta: dict[str, Any]) -> dict[str, Any]:
+        if self.max_bytes is not None:
+            projected = self.byte_size + self._size_change(self._shared_sizes, delta)
+            if user_id and user_delta:
+                projected += self._size_change(self._user_sizes.get(user_id, {}), user_delta)
+            if projected > self.max_bytes:
+                raise RoomCapacityError(f"room state would exceed {self.max_bytes} bytes")
+
+        self.version += 1
+        self.byte_size += _compact_update(self.shared_state, self._shared_sizes, delta)
+        if user_id and user_delta:
+            current = self.user_states.setdefault(user_id, {})
+            self.byte_size += _compact_update(current, self._user_sizes.setdefault(user_id, {}), user_delta)
+            if not current:
+                self._drop_user(user_id)
+        self.touch(user_id)
+        return self.snapshot(user_id)
+
+    def snapshot(self, user_id: str | None) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "shared_state": self.shared_state,
+            "user_state": self.user_states.get(user_id or "", {}),
+        }
+
+    def expire_user_states(self, now: float | None = None) -> int:
+        if self.user_state_ttl_seconds is None:
+            return 0
+        now = self._clock() if now is None else now
+        expired = [
+            user_id
+            for user_id in self.user_states
+            if user_id not in self._connected_users
+            and now - self._user_last_seen.get(user_id, self.last_active) > self.user_state_ttl_seconds
+        ]
+        for user_id in expired:
+            self._drop_user(user_id)
+        return len(expired)
+
+    def is_idle(self, now: float, idle_ttl_seconds: float) -> bool:
+        return not self.clients and now - self.last_active > idle_ttl_seconds
+
+    def is_empty(self) -> bool:
+        return not self.shared_state and not self.user_states
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "shared_state": self.shared_state,
+            "user_states": {user_id: state for user_id, state in self.user_states.items() if state},
+        }
+
+    def load_dict(self, data: dict[str, Any]) -> None:
+        self.version = int(data.get("version", 0))
+        self.shared_state = {}
+        self._shared_sizes = {}
+        self.byte_size = _compact_update(self.shared_state, self._shared_sizes, data.get("shared_state", {}))
+        for user_id, state in data.get("user_states", {}).items():
+            self.user_states[user_id] = {}
+            self.byte_size += _compact_update(self.user_states[user_id], self._user_sizes.setdefault(user_id, {}), state)
+            self._user_last_seen[user_id] = self._clock()
+        self.touch()
+
+    def _drop_user(self, user_id: str) -> None:
+        self.user_states.pop(user_id, None)
+        self.byte_size -= sum(self._user_sizes.pop(user_id, {}).values())
+        self._user_last_seen.pop(user_id, None)
+
+    @staticmethod
+    def _size_change(sizes: dict[str, int], delta: dict[str, Any]) -> int:
+        return sum(
+            (0 if value is None else _encoded_size(key, value)) - sizes.get(key, 0)
+            for key, value in delta.items()
+        )
+
+
+class StateSyncRoomRegistry:
+    def __init__(
+        self,
+        idle_ttl_seconds: float = 900.0,
+        max_room_bytes: int | None = 1_048_576,
+        user_state_ttl_seconds: float | None = 3_600.0,
+        spill_dir: Path | None = None,
+        sweep_interval_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.max_room_bytes = max_room_bytes
+        self.user_state_ttl_seconds = user_state_ttl_seconds
+        self.spill_dir = spill_dir
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._clock = clock
+        self._rooms: dict[str, StateSyncRoom] = {}
+        self._last_sweep = clock()
+        self._evicted = 0
+        self._user_states_expired = 0
+
+    @classmethod
+    def from_env(cls) -> "StateSyncRoomRegistry":
+        spill_dir = os.environ.get("AGNS_ROOM_SPILL_DIR")
+        max_room_bytes = int(os.environ.get("AGNS_ROOM_MAX_BYTES", "1048576"))
+        return cls(
+            idle_ttl_seconds=float(os.environ.get("AGNS_ROOM_IDLE_TTL_SECONDS", "900")),
+            max_room_bytes=max_room_bytes if max_room_bytes > 0 else None,
+            user_state_ttl_seconds=float(os.environ.get("AGNS_USER_STATE_TTL_SECONDS", "3600")),
+            spill_dir=Path(spill_dir) if spill_dir else None,
+        )
+
+    def __contains__(self, room_id: object) -> bool:
+        return room_id in self._rooms
+
+    def __len__(self) -> int:
+        return len(self._rooms)
+
+    def get(self, room_id: str) -> StateSyncRoom:
+        self._sweep_if_due()
+        room = self._rooms.get(room_id)
+        if room is None:
+            room = StateSyncRoom(
+                max_bytes=self.max_room_bytes,
+                user_state_ttl_seconds=self.user_state_ttl_seconds,
+                clock=self._clock,
+            )
+            if self.spill_dir is not None:
+                # Check the disk rather than an in-memory index, so rooms spilled before a restart come back too.
+                self._restore(room_id, room)
+            self._rooms[room_id] = room
+        room.touch()
+        return room
+
+    def _sweep_if_due(self) -> None:
+        now = self._clock()
+        if now - self._last_sweep >= self.sweep_interval_seconds:
+            self.sweep(now)
+
+    def sweep(self, now: float | None = None) -> int:
+        now = self._clock() if now is None else now
+        self._last_sweep = now
+        evicted = 0
+        for room_id, room in list(self._rooms.items()):
+            self._user_states_expired += room.expire_user_states(now)
+            if not room.is_idle(now, self.idle_ttl_seconds):
+                continue
+            if self.spill_dir is not None and not room.is_empty():
+                self._spill(room_id, room)
+            del self._rooms[room_id]
+            evicted += 1
+        self._evicted += evicted
+        return evicted
+
+    def clear(self) -> None:
+        self._rooms.clear()
+
+    def stats(self) -> dict[str, Any]:
+        self._sweep_if_due()
+        sizes = {room_id: room.byte_size for room_id, room in self._rooms.items()}
+        largest = sorted(sizes.items(), key=lambda item: -item[1])[:5]
+        return {
+            "room_count": len(self._rooms),
+            "spilled_room_count": self._spilled_room_count(),
+            "client_count": sum(len(room.clients) for room in self._rooms.values()),
+            "user_state_count": sum(len(room.user_states) for room in self._rooms.values()),
+            "total_bytes": sum(sizes.values()),
+            "max_room_bytes": self.max_room_bytes,
+            "largest_rooms": [{"room_id": room_id, "bytes": size} for room_id, size in largest],
+            "evicted_rooms": self._evicted,
+            "expired_user_states": self._user_states_expired,
+        }
+
+    def _spilled_room_count(self) -> int:
+        if self.spill_dir is None or not self.spill_dir.is_dir():
+            return 0
+        return sum(1 for _ in self.spill_dir.glob("*.json"))
+
+    def _spill_path(self, room_id: str) -> Path:
+        assert self.spill_dir is not None
+        return self.spill_dir / f"{hashlib.sha256(room_id.encode('utf-8')).hexdigest()}.json"
+
+    def _spill(self, room_id: str, room: StateSyncRoom) -> None:
+        assert self.spill_dir is not None
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        path = self._spill_path(room_id)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps({"room_id": room_id, **room.to_dict()}, separators=(",", ":"), ensure_ascii=False),
+            encoding="utf-8",
+        )
+        tmp_path.replace(path)
+
+    def _restore(self, room_id: str, room: StateSyncRoom) -> None:
+        path = self._spill_path(room_id)
+        if not path.exists():
+            return
+        room.load_dict(json.loads(path.read_text(encoding="utf-8")))
+        path.unlink()
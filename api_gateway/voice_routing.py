@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent / "voice_routing.json"
+DEFAULT_LOCALES_DIR = REPO_ROOT / "locales"
+DEFAULT_MODEL_TEMPLATE = "whisper-general-{language}"
+
+# (model, what matched: a locale tag, "region_default" or "default")
+Route = tuple[str, str]
+
+
+def canonical_tag(tag: str) -> str:
+    """BCP-47 casing: ``th_th`` -> ``th-TH``, ``ZH-hant-tw`` -> ``zh-Hant-TW``."""
+    subtags = tag.replace("_", "-").split("-")
+    canonical = [subtags[0].lower()]
+    for subtag in subtags[1:]:
+        if len(subtag) == 4 and subtag.isalpha():
+            canonical.append(subtag.title())
+        elif (len(subtag) == 2 and subtag.isalpha()) or (len(subtag) == 3 and subtag.isdigit()):
+            canonical.append(subtag.upper())
+        else:
+            canonical.append(subtag.lower())
+    return "-".join(canonical)
+
+
+def fallback_chain(tag: str) -> list[str]:
+    """RFC 4647 lookup order for a canonical tag: ``zh-Hant-TW`` -> ``zh-Hant`` -> ``zh``."""
+    subtags = tag.split("-")
+    return ["-".join(subtags[:end]) for end in range(len(subtags), 0, -1)]
+
+
+class VoiceRoutingTable:
+    """Every known ``(locale, region)`` pair resolved ahead of time into one flat dict."""
+
+    def __init__(
+        self,
+        routes: dict[tuple[str, str], str],
+        region_defaults: dict[str, str],
+        default_model: str = DEFAULT_MODEL_TEMPLATE,
+        locales: frozenset[str] = frozenset(),
+        regions: frozenset[str] = frozenset(),
+    ) -> None:
+        self._routes = routes
+        self._region_defaults = region_defaults
+        self._default_model = default_model
+        self.locales = locales
+        self.regions = regions
+        self._flat: dict[tuple[str, str], Route] = {}
+        for locale in locales:
+            for prefix in fallback_chain(locale):
+                for region in regions:
+                    route = self._walk(prefix, region)
+                    self._flat[(prefix, region)] = route
+                    # Lower-case alias so already-normalized callers also hit without any string work.
+                    self._flat.setdefault((prefix.lower(), region), route)
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any], locale_tags: list[str]) -> "VoiceRoutingTable":
+        routes = {
+            (canonical_tag(route["locale"]), route["region"].lower()): route["model"]
+            for route in config.get("routes", [])
+        }
+        region_defaults = {region.lower(): model for region, model in config.get("region_defaults", {}).items()}
+        locales = {canonical_tag(tag) for tag in [*locale_tags, *config.get("locales", [])]}
+        locales.update(locale for locale, _ in routes)
+        regions = {region.lower() for region in config.get("regions", [])}
+        regions.update(region for _, region in routes)
+        regions.update(region_defaults)
+        return cls(
+            routes=routes,
+            region_defaults=region_defaults,
+            default_model=config.get("default_model", DEFAULT_MODEL_TEMPLATE),
+            locales=frozenset(locales),
+            regions=frozenset(regions),
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self._flat)
+
+    def _walk(self, tag: str, region: str) -> Route:
+        for prefix in fallback_chain(tag):
+            model = self._routes.get((prefix, region))
+            if model is not None:
+                return model, prefix
+        language = tag.split("-", 1)[0]
+        region_default = self._region_defaults.get(region)
+        if region_default is not None:
+            return region_default.format(language=language), "region_default"
+        return self._default_model.format(language=language), "default"
+
+    def route(self, language: str, region: str) -> Route:
+        route = self._flat.get((language, region))
+        if route is not None:
+            return route
+        tag = canonical_tag(language)
+        region_key = region.lower()
+        route = self._flat.get((tag, region_key))
+        if route is not None:
+            return route
+        # Unknown locale or region: walk the chain now rather than caching arbitrary client input.
+        return self._walk(tag, region_key)
+
+    def resolve(self, language: str, region: str) -> str:
+        return self.route(language, region)[0]
+
+
+class VoiceRoutingStore:
+    """Rebuilds the routing table when the config file or any ``locales/*.json`` file changes."""
+
+    def __init__(
+        self,
+        config_path: Path = DEFAULT_CONFIG_PATH,
+        locales_dir: Path = DEFAULT_LOCALES_DIR,
+        check_interval_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.config_path = Path(config_path)
+        self.locales_dir = Path(locales_dir)
+        self.check_interval_seconds = check_interval_seconds
+        self._clock = clock
+        self._table = VoiceRoutingTable({}, {})
+        self._signature: tuple[tuple[str, int, int], ...] | None = None
+        self._next_check = float("-inf")
+        self._reload_lock = threading.Lock()
+        self.generation = 0
+        self.last_error: str | None = None
+
+    @classmethod
+    def from_env(cls) -> "VoiceRoutingStore":
+        return cls(
+            config_path=Path(os.getenv("AGNS_VOICE_ROUTING_CONFIG", str(DEFAULT_CONFIG_PATH))),
+            locales_dir=Path(os.getenv("AGNS_LOCALES_DIR", str(DEFAULT_LOCALES_DIR))),
+            check_interval_seconds=float(os.getenv("AGNS_VOICE_ROUTING_RELOAD_SECONDS", "5.0")),
+        )
+
+    def get(self) -> VoiceRoutingTable:
+        now = self._clock()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval_seconds
+            self.reload_if_changed()
+        return self._table
+
+    def _locale_files(self) -> list[Path]:
+        return sorted(self.locales_dir.glob("*.json"))
+
+    def _current_signature(self) -> tuple[tuple[str, int, int], ...]:
+        signature = []
+        for path in [self.config_path, *self._locale_files()]:
+            stat = path.stat()
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def reload_if_changed(self, force: bool = False) -> bool:
+        with self._reload_lock:
+            try:
+                signature = self._current_signature()
+                if signature == self._signature and not force:
+                    return False
+                with self.config_path.open("r", encoding="utf-8") as handle:
+                    config = json.load(handle)
+                table = VoiceRoutingTable.from_config(config, [path.stem for path in self._locale_files()])
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as exc:
+                # Keep routing with the previous table until the files are readable again.
+                self.last_error = str(exc)
+                return False
+            self._table = table
+            self._signature = signature
+            self.generation += 1
+            self.last_error = None
+            return True
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "config_path": str(self.config_path),
+            "locales_dir": str(self.locales_dir),
+            "generation": self.generation,
+            "locales": sorted(self._table.locales),
+            "regions": sorted(self._table.regions),
+            "precomputed_routes": self._table.size,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import functools
+import importlib
+import json
+from typing import Any, Iterable
+
+from fastapi import WebSocket
+
+MSGPACK_SUBPROTOCOL = "msgpack"
+
+
+@functools.lru_cache(maxsize=None)
+def _msgpack_codec_module() -> Any:
+    # Deferred so JSON-only gateways never import the bus module or msgspec.
+    return importlib.import_module("api_gateway.aetherbus_extreme")
+
+
+class JsonCodec:
+    name = "json"
+    subprotocol: str | None = None
+
+    def encode(self, message: Any) -> str:
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    async def receive(self, websocket: WebSocket) -> Any:
+        return await websocket.receive_json()
+
+    async def send_frame(self, websocket: WebSocket, frame: str | bytes) -> None:
+        await websocket.send_text(frame)  # type: ignore[arg-type]
+
+
+class MsgpackCodec:
+    name = "msgpack"
+    subprotocol: str | None = MSGPACK_SUBPROTOCOL
+
+    def encode(self, message: Any) -> bytes:
+        return _msgpack_codec_module().serialize_to_msgpack(message)
+
+    async def receive(self, websocket: WebSocket) -> Any:
+        return _msgpack_codec_module().deserialize_from_msgpack(await websocket.receive_bytes())
+
+    async def send_frame(self, websocket: WebSocket, frame: str | bytes) -> None:
+        await websocket.send_bytes(frame)  # type: ignore[arg-type]
+
+
+WebSocketCodec = JsonCodec | MsgpackCodec
+
+JSON_CODEC = JsonCodec()
+MSGPACK_CODEC = MsgpackCodec()
+
+
+def negotiate_codec(websocket: WebSocket) -> WebSocketCodec:
+    offered = websocket.scope.get("subprotocols") or []
+    # Only a client offering msgpack pays for importing the bus module.
+    if MSGPACK_SUBPROTOCOL in offered and _msgpack_codec_module().msgpack_available():
+        return MSGPACK_CODEC
+    return JSON_CODEC
+
+
+async def accept_with_codec(websocket: WebSocket) -> WebSocketCodec:
+    codec = negotiate_codec(websocket)
+    await websocket.accept(subprotocol=codec.subprotocol)
+    websocket.state.codec = codec
+    return codec
+
+
+def codec_of(websocket: WebSocket) -> WebSocketCodec:
+    return getattr(websocket.state, "codec", JSON_CODEC)
+
+
+async def send_message(websocket: WebSocket, message: Any) -> None:
+    codec = codec_of(websocket)
+    await codec.send_frame(websocket, codec.encode(message))
+
+
+async def broadcast(clients: Iterable[WebSocket], message: Any) -> list[WebSocket]:
+    """Send ``message`` to every client, encoding it once per codec; returns clients that failed."""
+    frames: dict[str, str | bytes] = {}
+    failed: list[WebSocket] = []
+    for client in clients:
+        codec = codec_of(client)
+        frame = frames.get(codec.name)
+        if frame is None:
+            frame = frames[codec.name] = codec.encode(message)
+        try:
+            await codec.send_frame(client, frame)
+        except Exception:
+            failed.append(client)
+    return failed
@@ -0,0 +1,224 @@
+"""Run from the repository root with ``python -m tools.benchmarks.aetherbus_benchmark``."""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from api_gateway.aetherbus_extreme import AetherBusExtreme, AkashicEnvelope
+from tools.benchmarks.gateway_load_benchmark import percentile
+
+HEARTBEAT_INTERVAL_SECONDS = 0.001
+COMPARED_METRICS = (("deliveries_per_sec", -1), ("latency_p99_ms", 1), ("loop_lag_p99_ms", 1))
+
+
+def _ms(values: list[float], q: float) -> float | None:
+    value = percentile(values, q)
+    return None if value is None else round(value * 1000, 3)
+
+
+async def _heartbeat(lags: list[float], stop: asyncio.Event) -> None:
+    """Records how late each 1 ms tick fires; anything hogging the loop shows up here."""
+    loop = asyncio.get_running_loop()
+    expected = loop.time() + HEARTBEAT_INTERVAL_SECONDS
+    while not stop.is_set():
+        await asyncio.sleep(HEARTBEAT_INTERVAL_SECONDS)
+        now = loop.time()
+        lags.append(max(0.0, now - expected))
+        expected = now + HEARTBEAT_INTERVAL_SECONDS
+
+
+async def run_case(
+    handlers: int,
+    payload_bytes: int,
+    topics: int,
+    max_concurrent_handlers: int,
+    messages: int,
+    burst: int,
+    max_queue_backpressure: int,
+    handler_sleep_ms: float = 0.0,
+    drain_timeout: float = 30.0,
+) -> dict[str, Any]:
+    bus = AetherBusExtreme(
+        queue_maxsize=max(max_queue_backpressure + burst, 1),
+        max_queue_backpressure=max_queue_backpressure,
+        max_concurrent_handlers=max_concurrent_handlers,
+    )
+    latencies: list[float] = []
+    delivered = asyncio.Event()
+    # Unknown until publishing finishes; handlers must not signal completion before then.
+    expected_deliveries: int | None = None
+    handler_sleep = handler_sleep_ms / 1000
+
+    def make_handler() -> Any:
+        async def handler(envelope: AkashicEnvelope) -> None:
+            latencies.append(time.perf_counter() - envelope.payload["t0"])
+            if handler_sleep:
+                await asyncio.sleep(handler_sleep)
+            if expected_deliveries is not None and len(latencies) >= expected_deliveries:
+                delivered.set()
+
+        return handler
+
+    topic_names = [f"bench.{idx}" for idx in range(topics)]
+    for topic in topic_names:
+        for _ in range(handlers):
+            bus.subscribe(topic, make_handler())
+
+    blob = b"x" * payload_bytes
+    lags: list[float] = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(lags, stop))
+    await bus.start()
+
+    accepted = rejected = peak_queue = peak_tasks = 0
+    started = time.perf_counter()
+    topic_cycle = itertools.cycle(topic_names)
+    for offset in range(0, messages, burst):
+        for _ in range(min(burst, messages - offset)):
+            envelope = AkashicEnvelope.create("bench", {"t0": time.perf_counter(), "blob": blob})
+            if bus.publish_nowait(next(topic_cycle), envelope):
+                accepted += 1
+            else:
+                rejected += 1
+        peak_queue = max(peak_queue, bus._queue.qsize())
+        peak_tasks = max(peak_tasks, len(bus._background_tasks))
+        await asyncio.sleep(0)
+    publish_seconds = time.perf_counter() - started
+
+    expected_deliveries = accepted * handlers
+    if len(latencies) >= expected_deliveries:
+        delivered.set()
+    try:
+        await asyncio.wait_for(delivered.wait(), timeout=drain_timeout)
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await heartbeat
+    await bus.shutdown()
+
+    latencies.sort()
+    lags.sort()
+    return {
+        "config": {
+            "handlers": handlers,
+            "payload_bytes": payload_bytes,
+            "topics": topics,
+            "max_concurrent_handlers": max_concurrent_handlers,
+            "messages": messages,
+            "burst": burst,
+            "max_queue_backpressure": max_queue_backpressure,
+            "handler_sleep_ms": handler_sleep_ms,
+        },
+        "accepted": accepted,
+        "rejected": rejected,
+        "rejected_ratio": round(rejected / messages, 4) if messages else 0.0,
+        "deliveries": len(latencies),
+        "complete": len(latencies) >= expected_deliveries,
+        "drain_seconds": round(elapsed - publish_seconds, 4),
+        "publish_per_sec": round(accepted / publish_seconds, 1) if publish_seconds > 0 else None,
+        "deliveries_per_sec": round(len(latencies) / elapsed, 1) if elapsed > 0 else None,
+        "latency_p50_ms": _ms(latencies, 0.50),
+        "latency_p95_ms": _ms(latencies, 0.95),
+        "latency_p99_ms": _ms(latencies, 0.99),
+        "latency_max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+        "loop_lag_p50_ms": _ms(lags, 0.50),
+        "loop_lag_p99_ms": _ms(lags, 0.99),
+        "loop_lag_max_ms": round(lags[-1] * 1000, 3) if lags else None,
+        "peak_queue_depth": peak_queue,
+        "peak_handler_tasks": peak_tasks,
+    }
+
+
+def case_key(config: dict[str, Any]) -> str:
+    return ",".join(f"{name}={config[name]}" for name in sorted(config))
+
+
+async def run_sweep(args: argparse.Namespace) -> dict[str, Any]:
+    cases = []
+    for handlers, payload_bytes, topics, max_concurrent in itertools.product(
+        args.handlers, args.payload_bytes, args.topics, args.max_concurrent_handlers
+    ):
+        cases.append(
+            await run_case(
+                handlers=handlers,
+                payload_bytes=payload_bytes,
+                topics=topics,
+                max_concurrent_handlers=max_concurrent,
+                messages=args.messages,
+                burst=args.burst,
+                max_queue_backpressure=args.max_queue_backpressure,
+                handler_sleep_ms=args.handler_sleep_ms,
+            )
+        )
+    return {"cases": cases}
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], max_regression: float) -> dict[str, Any]:
+    previous_by_key = {case_key(case["config"]): case for case in baseline.get("cases", [])}
+    rows = {}
+    regressions = []
+    for case in report["cases"]:
+        key = case_key(case["config"])
+        previous = previous_by_key.get(key)
+        if previous is None:
+            continue
+        row = {}
+        for metric, direction in COMPARED_METRICS:
+            now, then = case[metric], previous[metric]
+            if not now or not then:
+                continue
+            change = (now - then) / then
+            row[metric] = {"baseline": then, "current": now, "change": round(change, 4)}
+            if change * direction > max_regression:
+                regressions.append(f"{key}:{metric}")
+        rows[key] = row
+    return {"max_regression": max_regression, "cases": rows, "regressions": regressions}
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="AetherBusExtreme throughput, latency and loop-lag sweep")
+    parser.add_argument("--handlers", type=int, nargs="+", default=[1, 8], help="Handlers subscribed per topic")
+    parser.add_argument("--payload-bytes", type=int, nargs="+", default=[64, 4096])
+    parser.add_argument("--topics", type=int, nargs="+", default=[1, 16], help="Topics messages are spread across")
+    parser.add_argument("--max-concurrent-handlers", type=int, nargs="+", default=[64, 2048])
+    parser.add_argument("--messages", type=int, default=20_000)
+    parser.add_argument("--burst", type=int, default=256, help="Messages published between event-loop yields")
+    parser.add_argument(
+        "--max-queue-backpressure",
+        type=int,
+        default=80_000,
+        help="Lower it below --burst to measure rejection under backpressure",
+    )
+    parser.add_argument("--handler-sleep-ms", type=float, default=0.0, help="Simulated awaited work per handler")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    return parser.parse_args()
+
+
+def _main() -> int:
+    args = _parse_args()
+    report = asyncio.run(run_sweep(args))
+
+    failed = False
+    if args.baseline:
+        with args.baseline.open("r", encoding="utf-8") as handle:
+            report["comparison"] = compare(report, json.load(handle), args.max_regression)
+        failed = bool(report["comparison"]["regressions"])
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(rendered + "\n", encoding="utf-8")
+    print(rendered)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
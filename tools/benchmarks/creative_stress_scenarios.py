@@ -2,46 +2,150 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
-from pathlib import Path
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass, field
 from typing import Any
 
+DEFAULT_WINDOW_TICKS = 8
+DEFAULT_HISTORY_LIMIT = 1024
+MAX_EMOTIONAL_INTENSITY = 0.95
+_HISTORY_FIELDS = ("tick", "intent", "stated_intent", "emotional_intensity", "allowed", "truthful", "spam_guard")
+
+
+@dataclass(slots=True)
+class GateCounters:
+    evaluated: int = 0
+    allowed: int = 0
+    untruthful: int = 0
+    spam_guarded: int = 0
+    cooling_down: int = 0
+    over_intensity: int = 0
+
+    def merge(self, other: "GateCounters") -> None:
+        for name in self.__slots__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
 
 @dataclass
 class ManifestationGate:
+    """Per-session gate; ticks are expected to be non-decreasing, so the window only ever drops from the left."""
+
     cooldown_ticks: int
     max_events_per_window: int
+    window_ticks: int = DEFAULT_WINDOW_TICKS
+    history_limit: int | None = DEFAULT_HISTORY_LIMIT
+    counters: GateCounters = field(default_factory=GateCounters)
 
     def __post_init__(self) -> None:
         self._last_emit_tick = -999
-        self._window: list[int] = []
-        self._history: list[dict[str, Any]] = []
+        # Only allowed ticks enter the window and an append needs a free slot, so it never exceeds the limit.
+        self._window: deque[int] = deque(maxlen=max(self.max_events_per_window, 1))
+        # Compact tuples in a ring buffer; ``history`` expands them to dicts on demand.
+        self._history: deque[tuple[Any, ...]] | None = (
+            deque(maxlen=self.history_limit) if self.history_limit != 0 else None
+        )
 
     def evaluate(self, tick: int, intent: str, stated_intent: str, emotional_intensity: float) -> bool:
+        window = self._window
+        while window and tick - window[0] > self.window_ticks:
+            window.popleft()
+
         truthful = intent == stated_intent
-        self._window = [t for t in self._window if tick - t <= 8]
-        spammed = len(self._window) >= self.max_events_per_window
+        spammed = len(window) >= self.max_events_per_window
         cooling_down = tick - self._last_emit_tick < self.cooldown_ticks
-        allow = truthful and not spammed and not cooling_down and emotional_intensity <= 0.95
+        calm = emotional_intensity <= MAX_EMOTIONAL_INTENSITY
+        allow = truthful and not spammed and not cooling_down and calm
 
         if allow:
-            self._window.append(tick)
+            window.append(tick)
             self._last_emit_tick = tick
 
-        self._history.append({
-            "tick": tick,
-            "intent": intent,
-            "stated_intent": stated_intent,
-            "emotional_intensity": emotional_intensity,
-            "allowed": allow,
-            "truthful": truthful,
-            "spam_guard": not spammed,
-        })
+        counters = self.counters
+        counters.evaluated += 1
+        if allow:
+            counters.allowed += 1
+        else:
+            counters.untruthful += not truthful
+            counters.spam_guarded += spammed
+            counters.cooling_down += cooling_down
+            counters.over_intensity += not calm
+
+        if self._history is not None:
+            self._history.append((tick, intent, stated_intent, emotional_intensity, allow, truthful, not spammed))
         return allow
 
     @property
     def history(self) -> list[dict[str, Any]]:
-        return self._history
+        if self._history is None:
+            return []
+        return [dict(zip(_HISTORY_FIELDS, entry)) for entry in self._history]
+
+
+class ManifestationGateRegistry:
+    """Lazily creates one gate per session; with ``max_sessions`` the least recently seen session is evicted."""
+
+    def __init__(
+        self,
+        cooldown_ticks: int,
+        max_events_per_window: int,
+        window_ticks: int = DEFAULT_WINDOW_TICKS,
+        history_limit: int | None = 0,
+        max_sessions: int | None = None,
+    ) -> None:
+        self.cooldown_ticks = cooldown_ticks
+        self.max_events_per_window = max_events_per_window
+        self.window_ticks = window_ticks
+        self.history_limit = history_limit
+        self.max_sessions = max_sessions
+        self._gates: OrderedDict[str, ManifestationGate] = OrderedDict()
+        self._retired = GateCounters()
+        self.evicted_sessions = 0
+
+    def __len__(self) -> int:
+        return len(self._gates)
+
+    def gate(self, session_id: str) -> ManifestationGate:
+        gate = self._gates.get(session_id)
+        if gate is None:
+            gate = ManifestationGate(
+                cooldown_ticks=self.cooldown_ticks,
+                max_events_per_window=self.max_events_per_window,
+                window_ticks=self.window_ticks,
+                history_limit=self.history_limit,
+            )
+            self._gates[session_id] = gate
+            if self.max_sessions is not None and len(self._gates) > self.max_sessions:
+                _, evicted = self._gates.popitem(last=False)
+                self._retired.merge(evicted.counters)
+                self.evicted_sessions += 1
+        elif self.max_sessions is not None:
+            self._gates.move_to_end(session_id)
+        return gate
+
+    def evaluate(
+        self,
+        session_id: str,
+        tick: int,
+        intent: str,
+        stated_intent: str,
+        emotional_intensity: float,
+    ) -> bool:
+        return self.gate(session_id).evaluate(tick, intent, stated_intent, emotional_intensity)
+
+    def drop(self, session_id: str) -> None:
+        gate = self._gates.pop(session_id, None)
+        if gate is not None:
+            self._retired.merge(gate.counters)
+
+    def counters(self) -> dict[str, int]:
+        total = GateCounters()
+        total.merge(self._retired)
+        for gate in self._gates.values():
+            total.merge(gate.counters)
+        return total.as_dict()
 
 
 def run_scenarios() -> dict[str, Any]:
@@ -72,6 +176,7 @@ def run_scenarios() -> dict[str, Any]:
     return {
         "scenario_count": 2,
         "events": gate.history,
+        "counters": gate.counters.as_dict(),
         "checks": {
             "no_spam": spam_blocked,
             "no_state_lie": untruthful_blocked,
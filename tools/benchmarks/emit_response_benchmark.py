@@ -0,0 +1,97 @@
+"""Run from the repository root with ``python -m tools.benchmarks.emit_response_benchmark``."""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+from typing import Any
+
+from tools.benchmarks.gateway_load_benchmark import SAMPLE_PAYLOAD
+
+EMIT_PATH = "/api/v1/cognitive/emit"
+HEADERS = {"x-api-key": "bench", "x-model-provider": "openai", "x-model-version": "gpt-4o"}
+
+
+def _scope(body: bytes, compact: bool) -> dict[str, Any]:
+    headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    headers.extend((name.encode(), value.encode()) for name, value in HEADERS.items())
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": EMIT_PATH,
+        "raw_path": EMIT_PATH.encode(),
+        "query_string": b"compact=true" if compact else b"",
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+
+
+async def asgi_post(app: Any, body: bytes, compact: bool) -> tuple[int, bytes]:
+    """One request straight through the ASGI app, without an HTTP client or server in the way."""
+    status = 0
+    chunks: list[bytes] = []
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message: dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(_scope(body, compact), receive, send)
+    return status, b"".join(chunks)
+
+
+async def run_mode(app: Any, body: bytes, requests: int, compact: bool) -> dict[str, Any]:
+    status, response = await asgi_post(app, body, compact)
+    if status != 200:
+        raise RuntimeError(f"emit returned {status}: {response[:200]!r}")
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    for _ in range(requests):
+        await asgi_post(app, body, compact)
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+    return {
+        "requests": requests,
+        "response_bytes": len(response),
+        "cpu_us_per_request": round(cpu / requests * 1_000_000, 1),
+        "wall_us_per_request": round(wall / requests * 1_000_000, 1),
+    }
+
+
+async def run_benchmark(requests: int, modes: list[str]) -> dict[str, Any]:
+    from api_gateway.main import app
+
+    body = SAMPLE_PAYLOAD.read_bytes()
+    return {mode: await run_mode(app, body, requests, compact=mode == "compact") for mode in modes}
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(description="CPU and bytes per /api/v1/cognitive/emit response")
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--modes", nargs="+", choices=["full", "compact"], default=["full", "compact"])
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    report = asyncio.run(run_benchmark(args.requests, args.modes))
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(rendered + "\n", encoding="utf-8")
+    print(rendered)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
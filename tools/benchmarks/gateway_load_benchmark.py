@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+import importlib
+import json
+import math
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SAMPLE_PAYLOAD = REPO_ROOT / "api_gateway" / "sample_emit_payload.json"
+
+HTTP_SCENARIOS = ("emit", "validate", "telemetry_ingest", "telemetry_query")
+WS_SCENARIOS = ("ws_cognitive_stream", "ws_state_sync")
+ALL_SCENARIOS = (*HTTP_SCENARIOS, "mixed", *WS_SCENARIOS)
+DEFAULT_MIX = "emit=5,validate=3,telemetry_ingest=1,telemetry_query=1"
+REGRESSION_METRICS = (("rps", -1), ("p95", 1), ("p99", 1))
+
+Request = Callable[[int], Awaitable[None]]
+
+
+def percentile(sorted_values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_ms: list[float], errors: int, seconds: float) -> dict[str, Any]:
+    ordered = sorted(latencies_ms)
+    completed = len(ordered)
+
+    def rounded(value: float | None) -> float | None:
+        return None if value is None else round(value, 3)
+
+    return {
+        "requests": completed + errors,
+        "errors": errors,
+        "seconds": round(seconds, 4),
+        "rps": round(completed / seconds, 1) if seconds > 0 else None,
+        "latency_ms": {
+            "mean": rounded(sum(ordered) / completed) if completed else None,
+            "p50": rounded(percentile(ordered, 0.50)),
+            "p95": rounded(percentile(ordered, 0.95)),
+            "p99": rounded(percentile(ordered, 0.99)),
+            "max": rounded(ordered[-1]) if ordered else None,
+        },
+    }
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix: dict[str, float] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in HTTP_SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown mix entry {name!r}; choose from {HTTP_SCENARIOS}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class PayloadFactory:
+    """Emit payloads with unique ids; ``invalid_ratio`` of them trip the FIRMA colour rule."""
+
+    def __init__(self, invalid_ratio: float, seed: int) -> None:
+        with SAMPLE_PAYLOAD.open("r", encoding="utf-8") as handle:
+            self._sample = json.load(handle)
+        self._invalid_ratio = invalid_ratio
+        self._rng = random.Random(seed)
+
+    def emit(self, idx: int) -> dict[str, Any]:
+        payload = copy.deepcopy(self._sample)
+        payload["session_id"] = f"load_session_{idx % 512}"
+        payload["model_response"]["trace_id"] = f"load_trace_{idx}"
+        if self._rng.random() < self._invalid_ratio:
+            payload["model_response"]["visual_manifestation"]["color_palette"]["primary"] = "#DC143C"
+        return payload
+
+    def telemetry(self, idx: int) -> dict[str, Any]:
+        return {"points": [{"metric": "load_latency", "value": float(idx % 250), "tags": {"worker": str(idx % 8)}}]}
+
+
+def server_rss_kb(pid: int | None) -> int | None:
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_server(startup_timeout: float = 20.0) -> Iterator[tuple[str, int]]:
+    port = _free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "api_gateway.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=REPO_ROOT,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + startup_timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"gateway exited with code {process.returncode} during startup")
+            try:
+                with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                    break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError("gateway did not start listening in time")
+                time.sleep(0.05)
+        yield base_url, process.pid
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def _drive(request: Request, total: int, concurrency: int) -> dict[str, Any]:
+    """Closed-loop load: ``concurrency`` workers each issue the next request as soon as the last one returns."""
+    latencies: list[float] = []
+    errors = 0
+    next_idx = 0
+
+    async def worker() -> None:
+        nonlocal errors, next_idx
+        while next_idx < total:
+            idx = next_idx
+            next_idx += 1
+            started = time.perf_counter()
+            try:
+                await request(idx)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def _http_requests(client: Any, payloads: PayloadFactory, headers: dict[str, str]) -> dict[str, Request]:
+    emit_headers = {**headers, "X-Model-Provider": "loadgen", "X-Model-Version": "1"}
+
+    async def checked(response: Any) -> None:
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+
+    async def emit(idx: int) -> None:
+        await checked(await client.post("/api/v1/cognitive/emit", json=payloads.emit(idx), headers=emit_headers))
+
+    async def validate(idx: int) -> None:
+        await checked(await client.post("/api/v1/cognitive/validate", json=payloads.emit(idx), headers=headers))
+
+    async def telemetry_ingest(idx: int) -> None:
+        await checked(await client.post("/api/v1/telemetry/ingest", json=payloads.telemetry(idx), headers=headers))
+
+    async def telemetry_query(idx: int) -> None:
+        params = {"metric": "load_latency", "window_seconds": 3600}
+        await checked(await client.get("/api/v1/telemetry/query", params=params, headers=headers))
+
+    return {
+        "emit": emit,
+        "validate": validate,
+        "telemetry_ingest": telemetry_ingest,
+        "telemetry_query": telemetry_query,
+    }
+
+
+def _mixed_request(requests: dict[str, Request], mix: dict[str, float], seed: int) -> Request:
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+
+    async def mixed(idx: int) -> None:
+        await requests[rng.choices(names, weights)[0]](idx)
+
+    return mixed
+
+
+async def _ws_cognitive_stream(ws_url: str, api_key: str, payloads: PayloadFactory, args: argparse.Namespace) -> Any:
+    websockets = importlib.import_module("websockets")
+    per_client = max(1, args.requests // args.concurrency)
+
+    async def client_session(client_idx: int, latencies: list[float]) -> None:
+        async with websockets.connect(f"{ws_url}/ws/cognitive-stream?api_key={api_key}") as socket_:
+            for message_idx in range(per_client):
+                seq = client_idx * per_client + message_idx
+                frame = {"type": "dsl_submission", "seq": seq, "submission": payloads.emit(seq)}
+                started = time.perf_counter()
+                await socket_.send(json.dumps(frame))
+                reply = json.loads(await socket_.recv())
+                if reply.get("seq") != seq:
+                    raise RuntimeError(f"unexpected reply {reply!r}")
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    return await _run_ws_clients(client_session, args.concurrency, per_client)
+
+
+async def _ws_state_sync(ws_url: str, api_key: str, payloads: PayloadFactory, args: argparse.Namespace) -> Any:
+    websockets = importlib.import_module("websockets")
+    per_client = max(1, args.requests // args.concurrency)
+
+    async def client_session(client_idx: int, latencies: list[float]) -> None:
+        room = f"load-room-{client_idx // args.room_size}"
+        key = f"client_{client_idx}"
+        async with websockets.connect(f"{ws_url}/ws/state-sync/{room}?user_id={key}&api_key={api_key}") as socket_:
+            await socket_.recv()  # initial snapshot
+            for message_idx in range(per_client):
+                started = time.perf_counter()
+                await socket_.send(json.dumps({"type": "patch_state", "delta": {key: message_idx}}))
+                # Peers' broadcasts interleave with ours; wait until our own patch comes back.
+                while True:
+                    update = json.loads(await socket_.recv())
+                    if update.get("shared_state", {}).get(key) == message_idx:
+                        break
+                latencies.append((time.perf_counter() - started) * 1000)
+
+    return await _run_ws_clients(client_session, args.concurrency, per_client)
+
+
+async def _run_ws_clients(
+    session: Callable[[int, list[float]], Awaitable[None]],
+    clients: int,
+    per_client: int,
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    started = time.perf_counter()
+    outcomes = await asyncio.gather(*(session(idx, latencies) for idx in range(clients)), return_exceptions=True)
+    seconds = time.perf_counter() - started
+    failed_clients = sum(isinstance(outcome, BaseException) for outcome in outcomes)
+    return summarize(latencies, clients * per_client - len(latencies) if failed_clients else 0, seconds)
+
+
+async def run_load(base_url: str, args: argparse.Namespace, server_pid: int | None) -> dict[str, Any]:
+    httpx = importlib.import_module("httpx")
+    payloads = PayloadFactory(args.invalid_ratio, args.seed)
+    headers = {"X-API-Key": args.api_key}
+    ws_url = "ws" + base_url[len("http"):]
+
+    rss_start = server_rss_kb(server_pid)
+    scenarios: dict[str, Any] = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+        requests = _http_requests(client, payloads, headers)
+        for name in args.scenarios:
+            if name in WS_SCENARIOS:
+                runner = _ws_cognitive_stream if name == "ws_cognitive_stream" else _ws_state_sync
+                if args.warmup:
+                    await runner(ws_url, args.api_key, payloads, _scaled(args, args.warmup))
+                scenarios[name] = await runner(ws_url, args.api_key, payloads, args)
+            else:
+                request = _mixed_request(requests, args.mix, args.seed) if name == "mixed" else requests[name]
+                if args.warmup:
+                    await _drive(request, args.warmup, args.concurrency)
+                scenarios[name] = await _drive(request, args.requests, args.concurrency)
+            scenarios[name]["server_rss_kb"] = server_rss_kb(server_pid)
+    rss_end = server_rss_kb(server_pid)
+
+    return {
+        "target": base_url,
+        "config": {
+            "concurrency": args.concurrency,
+            "requests_per_scenario": args.requests,
+            "warmup": args.warmup,
+            "mix": args.mix,
+            "invalid_ratio": args.invalid_ratio,
+            "room_size": args.room_size,
+        },
+        "scenarios": scenarios,
+        "memory": {
+            "server_rss_kb_start": rss_start,
+            "server_rss_kb_end": rss_end,
+            "server_rss_kb_growth": rss_end - rss_start if rss_start is not None and rss_end is not None else None,
+        },
+    }
+
+
+def _scaled(args: argparse.Namespace, requests: int) -> argparse.Namespace:
+    scaled = copy.copy(args)
+    scaled.requests = max(requests, args.concurrency)
+    return scaled
+
+
+def compare(report: dict[str, Any], baseline: dict[str, Any], max_regression: float) -> dict[str, Any]:
+    """Relative change per scenario; rps regresses downward, latency percentiles upward."""
+    rows: dict[str, Any] = {}
+    regressions = []
+    for name, current in report["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        row = {}
+        for metric, direction in REGRESSION_METRICS:
+            now = current["rps"] if metric == "rps" else current["latency_ms"][metric]
+            then = previous["rps"] if metric == "rps" else previous["latency_ms"][metric]
+            if not now or not then:
+                continue
+            change = (now - then) / then
+            row[metric] = {"baseline": then, "current": now, "change": round(change, 4)}
+            if change * direction > max_regression:
+                regressions.append(f"{name}.{metric}")
+        rows[name] = row
+    return {
+        "max_regression": max_regression,
+        # Numbers from runs with different concurrency or mixes are not comparable.
+        "config_mismatch": report.get("config") != baseline.get("config"),
+        "scenarios": rows,
+        "regressions": regressions,
+    }
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Closed-loop load generator for the AGNS gateway")
+    parser.add_argument("--base-url", help="Existing gateway; by default a local uvicorn is started on a free port")
+    parser.add_argument("--server-pid", type=int, help="PID of --base-url's server, for RSS tracking")
+    parser.add_argument("--scenarios", nargs="+", choices=ALL_SCENARIOS, default=list(ALL_SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16, help="HTTP workers or WebSocket clients")
+    parser.add_argument("--requests", type=int, default=2_000, help="Requests/messages per scenario")
+    parser.add_argument("--warmup", type=int, default=200, help="Unmeasured requests before each scenario")
+    parser.add_argument(
+        "--mix",
+        type=parse_mix,
+        default=parse_mix(DEFAULT_MIX),
+        help=f"Weights for the 'mixed' scenario ({DEFAULT_MIX})",
+    )
+    parser.add_argument("--invalid-ratio", type=float, default=0.1, help="Share of DSL payloads violating FIRMA rules")
+    parser.add_argument("--room-size", type=int, default=4, help="WebSocket clients per state-sync room")
+    parser.add_argument("--api-key", default="loadgen")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", type=Path, help="Write the JSON report here as well as stdout")
+    parser.add_argument("--baseline", type=Path, help="Earlier report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed relative rps/p95/p99 regression")
+    return parser.parse_args()
+
+
+def _main() -> int:
+    args = _parse_args()
+    if args.base_url:
+        report = asyncio.run(run_load(args.base_url.rstrip("/"), args, args.server_pid))
+    else:
+        with local_server() as (base_url, pid):
+            report = asyncio.run(run_load(base_url, args, pid))
+
+    failed = False
+    if args.baseline:
+        with args.baseline.open("r", encoding="utf-8") as handle:
+            report["comparison"] = compare(report, json.load(handle), args.max_regression)
+        failed = bool(report["comparison"]["regressions"])
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(rendered + "\n", encoding="utf-8")
+    print(rendered)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
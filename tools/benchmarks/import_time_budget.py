@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_MODULE = "api_gateway.main"
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int, int]]:
+    """``(module, depth, self_us, cumulative_us)`` rows from ``python -X importtime`` output, in print order."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((module, depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure_once(module: str, python: str = sys.executable) -> list[tuple[str, int, int, int]]:
+    proc = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(proc.stderr)
+
+
+def summarize_run(rows: list[tuple[str, int, int, int]], module: str, owned_prefix: str) -> dict[str, Any]:
+    target_index = next(idx for idx, row in enumerate(rows) if row[0] == module and row[1] == 0)
+    _, _, target_self, target_cumulative = rows[target_index]
+    # Children print before their parent, so the target's imports are the rows just above it at depth >= 1.
+    start = target_index
+    while start > 0 and rows[start - 1][1] >= 1:
+        start -= 1
+    children = rows[start:target_index]
+    owned = {
+        name: cumulative
+        for name, depth, _, cumulative in children
+        if depth == 1 and name.startswith(owned_prefix)
+    }
+    return {
+        "total_us": target_cumulative,
+        "target_self_us": target_self,
+        "owned_us": sum(owned.values()),
+        "owned_modules": owned,
+        "self_us": {name: self_us for name, _, self_us, _ in rows},
+        "cumulative_us": {name: cumulative for name, _, _, cumulative in rows},
+    }
+
+
+def _median_ms(values: list[int]) -> float:
+    return round(statistics.median(values) / 1000, 2)
+
+
+def run_budget(module: str, runs: int, top: int, owned_prefix: str) -> dict[str, Any]:
+    # The first run compiles bytecode; it is not representative of a deployed pod.
+    measure_once(module)
+    summaries = [summarize_run(measure_once(module), module, owned_prefix) for _ in range(runs)]
+
+    def median_of(key: str, name: str) -> float:
+        return _median_ms([summary[key].get(name, 0) for summary in summaries])
+
+    names = set().union(*(summary["self_us"] for summary in summaries))
+    slowest = sorted(names, key=lambda name: median_of("self_us", name), reverse=True)[:top]
+    owned_names = sorted(set().union(*(summary["owned_modules"] for summary in summaries)))
+    return {
+        "module": module,
+        "runs": runs,
+        "total_ms": _median_ms([summary["total_us"] for summary in summaries]),
+        "target_self_ms": _median_ms([summary["target_self_us"] for summary in summaries]),
+        "owned_prefix": owned_prefix,
+        "owned_ms": _median_ms([summary["owned_us"] for summary in summaries]),
+        "owned_modules_ms": {
+            name: _median_ms([summary["owned_modules"].get(name, 0) for summary in summaries]) for name in owned_names
+        },
+        "slowest_self_ms": [
+            {"module": name, "self_ms": median_of("self_us", name), "cumulative_ms": median_of("cumulative_us", name)}
+            for name in slowest
+        ],
+    }
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(description="Import-time budget check based on python -X importtime")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--top", type=int, default=15, help="How many modules to list by self time")
+    parser.add_argument("--owned-prefix", default="api_gateway.", help="Modules counted towards --owned-budget-ms")
+    parser.add_argument("--budget-ms", type=float, help="Fail if the median import of --module exceeds this")
+    parser.add_argument("--owned-budget-ms", type=float, help="Fail if the repo's own direct imports exceed this")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    report = run_budget(args.module, args.runs, args.top, args.owned_prefix)
+    over = []
+    if args.budget_ms is not None and report["total_ms"] > args.budget_ms:
+        over.append(f"total {report['total_ms']}ms > {args.budget_ms}ms")
+    if args.owned_budget_ms is not None and report["owned_ms"] > args.owned_budget_ms:
+        over.append(f"owned {report['owned_ms']}ms > {args.owned_budget_ms}ms")
+    report["over_budget"] = over
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(rendered + "\n", encoding="utf-8")
+    print(rendered)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
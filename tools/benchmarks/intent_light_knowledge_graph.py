@@ -2,34 +2,58 @@
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
-from collections import defaultdict
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
+# (intent, light_pattern) -> [count, confidence_sum]
+EdgeStats = dict[tuple[str, str], list[float]]
 
-def build_graph(records: list[dict[str, Any]], min_k_anon: int = 3) -> dict[str, Any]:
-    edge_stats: dict[tuple[str, str], dict[str, float]] = defaultdict(lambda: {"count": 0, "confidence_sum": 0.0})
+DEFAULT_CHUNK_BYTES = 64 * 1024 * 1024
+SIDECAR_VERSION = 1
 
+
+def aggregate_records(records: Iterable[dict[str, Any]], edge_stats: EdgeStats | None = None) -> EdgeStats:
+    edge_stats = {} if edge_stats is None else edge_stats
     for row in records:
-        intent = row["intent"]
-        light_pattern = row["light_pattern"]
-        edge = edge_stats[(intent, light_pattern)]
-        edge["count"] += 1
-        edge["confidence_sum"] += row.get("operator_confidence", 0.0)
+        key = (row["intent"], row["light_pattern"])
+        confidence = row.get("operator_confidence", 0.0)
+        counters = edge_stats.get(key)
+        if counters is None:
+            edge_stats[key] = [1, confidence]
+        else:
+            counters[0] += 1
+            counters[1] += confidence
+    return edge_stats
+
+
+def merge_edge_stats(target: EdgeStats, partial: EdgeStats) -> EdgeStats:
+    for key, (count, confidence_sum) in partial.items():
+        counters = target.get(key)
+        if counters is None:
+            target[key] = [count, confidence_sum]
+        else:
+            counters[0] += count
+            counters[1] += confidence_sum
+    return target
+
 
+def finalize_graph(edge_stats: EdgeStats, min_k_anon: int = 3) -> dict[str, Any]:
     edges = []
-    for (intent, light_pattern), stats in edge_stats.items():
-        if stats["count"] < min_k_anon:
+    for (intent, light_pattern), (count, confidence_sum) in edge_stats.items():
+        if count < min_k_anon:
             continue
-        avg_confidence = stats["confidence_sum"] / stats["count"] if stats["count"] else 0.0
+        avg_confidence = confidence_sum / count if count else 0.0
         edges.append(
             {
                 "source": intent,
                 "target": light_pattern,
-                "count": int(stats["count"]),
+                "count": int(count),
                 "avg_confidence": round(avg_confidence, 3),
-                "calibration_weight": round(stats["count"] * avg_confidence, 3),
+                "calibration_weight": round(count * avg_confidence, 3),
             }
         )
 
@@ -45,21 +69,144 @@ def build_graph(records: list[dict[str, Any]], min_k_anon: int = 3) -> dict[str,
     }
 
 
+def build_graph(records: Iterable[dict[str, Any]], min_k_anon: int = 3) -> dict[str, Any]:
+    return finalize_graph(aggregate_records(records), min_k_anon=min_k_anon)
+
+
+def _iter_range(path: str, start: int, end: int) -> Iterable[dict[str, Any]]:
+    """Yield records whose line starts inside ``[start, end)``."""
+    with open(path, "rb") as handle:
+        if start:
+            # Finish the line that straddles ``start``; it belongs to the previous range.
+            handle.seek(start - 1)
+            handle.readline()
+        while handle.tell() < end:
+            line = handle.readline()
+            if not line:
+                break
+            if line.strip():
+                yield json.loads(line)
+
+
+def _aggregate_range(path: str, start: int, end: int) -> EdgeStats:
+    return aggregate_records(_iter_range(path, start, end))
+
+
+def byte_ranges(size: int, parts: int) -> list[tuple[int, int]]:
+    parts = max(1, min(parts, size or 1))
+    step = -(-size // parts)
+    return [(start, min(size, start + step)) for start in range(0, size, step)] or [(0, 0)]
+
+
+def aggregate_file(path: Path, workers: int = 1, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> EdgeStats:
+    """Aggregate a JSONL export with memory bounded by the number of distinct edges, not the file size."""
+    size = path.stat().st_size
+    if workers == 1:
+        return _aggregate_range(str(path), 0, size)
+
+    max_workers = workers or os.cpu_count() or 1
+    ranges = byte_ranges(size, max(max_workers, -(-size // chunk_bytes)))
+    edge_stats: EdgeStats = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        for partial in pool.map(_aggregate_range, [str(path)] * len(ranges), *zip(*ranges)):
+            merge_edge_stats(edge_stats, partial)
+    return edge_stats
+
+
+def save_edge_stats(path: Path, edge_stats: EdgeStats, applied_deltas: list[str]) -> None:
+    """Persist raw aggregates, including edges still below the k-anonymity threshold."""
+    payload = {
+        "version": SIDECAR_VERSION,
+        "applied_deltas": applied_deltas,
+        "edges": [
+            [intent, light_pattern, count, confidence_sum]
+            for (intent, light_pattern), (count, confidence_sum) in edge_stats.items()
+        ],
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.write_text(json.dumps(payload, separators=(",", ":"), ensure_ascii=False), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def load_edge_stats(path: Path) -> tuple[EdgeStats, list[str]]:
+    with path.open("r", encoding="utf-8") as handle:
+        payload = json.load(handle)
+    if payload.get("version") != SIDECAR_VERSION:
+        raise ValueError(f"unsupported edge sidecar version {payload.get('version')!r} in {path}")
+    edge_stats = {
+        (intent, light_pattern): [count, confidence_sum]
+        for intent, light_pattern, count, confidence_sum in payload["edges"]
+    }
+    return edge_stats, list(payload.get("applied_deltas", []))
+
+
+def file_fingerprint(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def apply_deltas(
+    edge_stats: EdgeStats,
+    applied_deltas: list[str],
+    deltas: Iterable[Path],
+    workers: int = 1,
+) -> list[Path]:
+    """Merge delta JSONL files into ``edge_stats``, skipping any whose content was already applied."""
+    merged = []
+    for delta in deltas:
+        fingerprint = file_fingerprint(delta)
+        if fingerprint in applied_deltas:
+            continue
+        merge_edge_stats(edge_stats, aggregate_file(delta, workers=workers))
+        applied_deltas.append(fingerprint)
+        merged.append(delta)
+    return merged
+
+
 def _main() -> int:
     parser = argparse.ArgumentParser(description="Intent-to-light knowledge graph builder")
-    parser.add_argument("--input", type=Path, required=True)
+    parser.add_argument("--input", type=Path, help="Full export; rebuilds the aggregates from scratch")
+    parser.add_argument("--delta", type=Path, action="append", default=[], help="JSONL delta merged into --state")
+    parser.add_argument("--state", type=Path, help="Sidecar file holding raw per-edge aggregates")
     parser.add_argument("--output", type=Path, required=True)
     parser.add_argument("--k-anon", type=int, default=3)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes aggregating byte ranges of the input; 1 streams in-process, 0 uses one per CPU",
+    )
+    parser.add_argument("--chunk-mb", type=int, default=DEFAULT_CHUNK_BYTES // (1024 * 1024))
     args = parser.parse_args()
+    if args.input is None and not args.delta:
+        parser.error("provide --input and/or --delta")
+    if args.delta and args.input is None and args.state is None:
+        parser.error("--delta without --input needs --state")
+
+    applied_deltas: list[str] = []
+    if args.input is not None:
+        edge_stats = aggregate_file(args.input, workers=args.workers, chunk_bytes=args.chunk_mb * 1024 * 1024)
+    elif args.state.exists():
+        edge_stats, applied_deltas = load_edge_stats(args.state)
+    else:
+        edge_stats = {}
 
-    with args.input.open("r", encoding="utf-8") as handle:
-        records = [json.loads(line) for line in handle if line.strip()]
+    merged = apply_deltas(edge_stats, applied_deltas, args.delta, workers=args.workers)
+    if args.state is not None:
+        save_edge_stats(args.state, edge_stats, applied_deltas)
 
-    graph = build_graph(records=records, min_k_anon=args.k_anon)
+    graph = finalize_graph(edge_stats, min_k_anon=args.k_anon)
     args.output.parent.mkdir(parents=True, exist_ok=True)
     with args.output.open("w", encoding="utf-8") as handle:
         json.dump(graph, handle, indent=2)
 
+    skipped = len(args.delta) - len(merged)
+    if skipped:
+        print(f"skipped {skipped} delta file(s) already merged into {args.state}")
     print(f"wrote graph to {args.output}")
     return 0
 
@@ -0,0 +1,76 @@
+"""Run from the repository root with ``python -m tools.benchmarks.ipw_normalization_benchmark``."""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from typing import Any
+
+from tools.contracts.contract_checker import _check_ipw_probability_policy, _load_numpy
+
+
+def build_payload(size: int, seed: int) -> dict[str, Any]:
+    rng = random.Random(seed)
+    return {
+        "ipw_type": "IPW_V1",
+        "predictions": [{"action_id": f"A{idx}", "p": rng.random()} for idx in range(size)],
+        "probability_policy": {"requires_normalization": True, "epsilon": 0.0001, "on_violation": "normalize"},
+    }
+
+
+def _copies(payload: dict[str, Any], count: int) -> list[dict[str, Any]]:
+    # Normalization rewrites ``p`` in place, so every timed call needs its own untouched payload.
+    return [
+        {**payload, "predictions": [dict(row) for row in payload["predictions"]]}
+        for _ in range(count)
+    ]
+
+
+def _time_policy(payload: dict[str, Any], iterations: int, vectorize: bool) -> tuple[float, list[str], dict[str, Any]]:
+    payloads = _copies(payload, iterations)
+    audits: list[str] = []
+    start = time.perf_counter()
+    for item in payloads:
+        audits = []
+        _check_ipw_probability_policy(item, audits, vectorize=vectorize)
+    elapsed_us = (time.perf_counter() - start) / iterations * 1_000_000
+    return elapsed_us, audits, payloads[-1]
+
+
+def run_benchmark(sizes: list[int], iterations: int, seed: int = 7) -> dict[str, Any]:
+    if _load_numpy() is None:
+        raise SystemExit("numpy is required for the vectorized path")
+
+    rows = []
+    for size in sizes:
+        payload = build_payload(size, seed)
+        loop_us, loop_audits, loop_payload = _time_policy(payload, iterations, vectorize=False)
+        vector_us, vector_audits, vector_payload = _time_policy(payload, iterations, vectorize=True)
+        rows.append(
+            {
+                "predictions": size,
+                "loop_us": round(loop_us, 3),
+                "vectorized_us": round(vector_us, 3),
+                "speedup": round(loop_us / max(vector_us, 1e-9), 2),
+                "audits_match": loop_audits == vector_audits,
+                "normalized_match": loop_payload["predictions"] == vector_payload["predictions"],
+            }
+        )
+    return {"iterations": iterations, "results": rows}
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(description="Loop vs vectorized IPW probability normalization")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 64, 256, 4096, 65536])
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    report = run_benchmark(args.sizes, args.iterations)
+    print(json.dumps(report, indent=2))
+    matched = all(row["audits_match"] and row["normalized_match"] for row in report["results"])
+    return 0 if matched else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
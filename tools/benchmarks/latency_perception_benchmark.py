@@ -2,10 +2,39 @@
 from __future__ import annotations
 
 import argparse
+import functools
+import importlib
+import importlib.util
 import json
-import statistics
+import math
+import operator
+import sys
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Callable, Iterable, Iterator
+
+GUNUI_TARGET_MS = 120.0
+SERIES = ("raw_rtt_ms", "perceived_latency_ms")
+PERCENTILES = {"p50": 0.50, "p90": 0.90, "p95": 0.95, "p99": 0.99}
+PERCENTILE_METHODS = ("exact", "sketch")
+DEFAULT_CHUNK_SIZE = 65_536
+DEFAULT_SKETCH_ACCURACY = 0.01
+
+_RAW_RTT = operator.itemgetter("raw_rtt_ms")
+_RENDER = operator.itemgetter("render_pipeline_ms")
+_COGNITIVE = operator.itemgetter("cognitive_settle_ms")
+
+
+def _load_numpy() -> Any | None:
+    if importlib.util.find_spec("numpy") is None:
+        return None
+    return importlib.import_module("numpy")
+
+
+@functools.lru_cache(maxsize=None)
+def _json_array_decoder() -> Callable[[bytes], Any]:
+    if importlib.util.find_spec("msgspec") is not None:
+        return importlib.import_module("msgspec").json.decode
+    return json.loads
 
 
 def perceived_latency_ms(sample: dict[str, float]) -> float:
@@ -16,42 +45,243 @@ def perceived_latency_ms(sample: dict[str, float]) -> float:
     return raw_rtt * 0.35 + render * 0.4 + cognitive * 0.25 + mismatch_penalty
 
 
-def run_benchmark(samples: list[dict[str, float]]) -> dict[str, Any]:
-    if not samples:
+def nearest_rank_index(count: int, q: float) -> int:
+    """0-based index of the nearest-rank percentile: the ceil(q * n)-th smallest value."""
+    return max(0, math.ceil(q * count) - 1)
+
+
+class ExactQuantiles:
+    """Keeps every value; percentiles are selected in O(n) with a partition instead of a full sort."""
+
+    def __init__(self, np: Any | None) -> None:
+        self._np = np
+        self._chunks: list[Any] = []
+        self.count = 0
+
+    def add(self, values: Any) -> None:
+        self._chunks.append(values)
+        self.count += len(values)
+
+    def quantiles(self, qs: dict[str, float]) -> dict[str, float]:
+        ranks = {name: nearest_rank_index(self.count, q) for name, q in qs.items()}
+        if self._np is not None:
+            values = self._np.concatenate(self._chunks)
+            selected = self._np.partition(values, sorted(set(ranks.values())))
+            return {name: float(selected[rank]) for name, rank in ranks.items()}
+        ordered = sorted(value for chunk in self._chunks for value in chunk)
+        return {name: ordered[rank] for name, rank in ranks.items()}
+
+
+class LogBucketSketch:
+    """Fixed-relative-error quantile sketch (DDSketch-style log buckets); memory grows with log(max/min), not n."""
+
+    def __init__(self, np: Any | None, relative_accuracy: float = DEFAULT_SKETCH_ACCURACY) -> None:
+        self._np = np
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets: dict[int, int] = {}
+        self._zeros = 0
+        self._min = math.inf
+        self._max = -math.inf
+        self.count = 0
+
+    def add(self, values: Any) -> None:
+        if not len(values):
+            return
+        self.count += len(values)
+        np = self._np
+        if np is not None:
+            self._min = min(self._min, float(values.min()))
+            self._max = max(self._max, float(values.max()))
+            positive = values[values > 0]
+            self._zeros += len(values) - len(positive)
+            keys, counts = np.unique(np.ceil(np.log(positive) / self._log_gamma).astype(np.int64), return_counts=True)
+            for key, count in zip(keys.tolist(), counts.tolist()):
+                self._buckets[key] = self._buckets.get(key, 0) + count
+            return
+        for value in values:
+            self._min = min(self._min, value)
+            self._max = max(self._max, value)
+            if value <= 0:
+                self._zeros += 1
+                continue
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[key] = self._buckets.get(key, 0) + 1
+
+    def quantiles(self, qs: dict[str, float]) -> dict[str, float]:
+        keys = sorted(self._buckets)
+        result = {}
+        for name, q in qs.items():
+            rank = nearest_rank_index(self.count, q) + 1
+            seen = self._zeros
+            estimate = 0.0
+            if rank > seen:
+                for key in keys:
+                    seen += self._buckets[key]
+                    if seen >= rank:
+                        estimate = 2 * self._gamma**key / (self._gamma + 1)
+                        break
+            result[name] = min(max(estimate, self._min), self._max)
+        return result
+
+
+class SeriesAccumulator:
+    def __init__(self, np: Any | None, method: str, sketch_accuracy: float) -> None:
+        if method not in PERCENTILE_METHODS:
+            raise ValueError(f"unknown percentile method {method!r}")
+        self._np = np
+        self._partial_sums: list[float] = []
+        self._quantiles = ExactQuantiles(np) if method == "exact" else LogBucketSketch(np, sketch_accuracy)
+
+    def add(self, values: Any) -> None:
+        # Per-chunk fsum partials keep the mean as accurate as statistics.fmean over the whole run.
+        self._partial_sums.append(math.fsum(values.tolist() if self._np is not None else values))
+        self._quantiles.add(values)
+
+    def summary(self) -> dict[str, float | None]:
+        count = self._quantiles.count
+        if not count:
+            return {"mean": None, **{name: None for name in PERCENTILES}}
+        quantiles = self._quantiles.quantiles(PERCENTILES)
         return {
-            "sample_count": 0,
-            "raw_rtt_ms": {"mean": None, "p95": None},
-            "perceived_latency_ms": {"mean": None, "p95": None},
-            "gunui_target_met": False,
+            "mean": round(math.fsum(self._partial_sums) / count, 3),
+            **{name: round(quantiles[name], 3) for name in PERCENTILES},
         }
 
-    raw = [row["raw_rtt_ms"] for row in samples]
-    perceived = [perceived_latency_ms(row) for row in samples]
+
+def _chunk_series(np: Any | None, chunk: list[dict[str, float]]) -> dict[str, Any]:
+    if np is None:
+        return {
+            "raw_rtt_ms": [row["raw_rtt_ms"] for row in chunk],
+            "perceived_latency_ms": [perceived_latency_ms(row) for row in chunk],
+        }
+    raw = np.array(list(map(_RAW_RTT, chunk)), dtype=np.float64)
+    render = np.array(list(map(_RENDER, chunk)), dtype=np.float64)
+    cognitive = np.array(list(map(_COGNITIVE, chunk)), dtype=np.float64)
+    mismatch = np.array([row.get("prediction_mismatch", 0.0) for row in chunk], dtype=np.float64)
+    # Same operation order as perceived_latency_ms, so results are bit-identical to the scalar formula.
+    perceived = raw * 0.35 + render * 0.4 + cognitive * 0.25 + mismatch * 25
+    return {"raw_rtt_ms": raw, "perceived_latency_ms": perceived}
+
+
+def score_chunks(
+    chunks: Iterable[list[dict[str, float]]],
+    method: str = "exact",
+    sketch_accuracy: float = DEFAULT_SKETCH_ACCURACY,
+    vectorize: bool = True,
+) -> dict[str, Any]:
+    np = _load_numpy() if vectorize else None
+    series = {name: SeriesAccumulator(np, method, sketch_accuracy) for name in SERIES}
+    sample_count = 0
+    for chunk in chunks:
+        if not chunk:
+            continue
+        sample_count += len(chunk)
+        for name, values in _chunk_series(np, chunk).items():
+            series[name].add(values)
+
+    result: dict[str, Any] = {"sample_count": sample_count, "percentile_method": method}
+    result.update({name: accumulator.summary() for name, accumulator in series.items()})
+    perceived_mean = result["perceived_latency_ms"]["mean"]
+    result["gunui_target_met"] = perceived_mean is not None and perceived_mean <= GUNUI_TARGET_MS
+    return result
+
+
+def run_benchmark(samples: list[dict[str, float]]) -> dict[str, Any]:
+    return score_chunks([samples], method="exact")
+
+
+def iter_ndjson_chunks(handle: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[list[dict[str, float]]]:
+    lines: list[bytes] = []
+    for line in handle:
+        line = line.strip()
+        if not line:
+            continue
+        lines.append(line)
+        if len(lines) >= chunk_size:
+            yield _parse_lines(lines)
+            lines = []
+    if lines:
+        yield _parse_lines(lines)
+
+
+def _parse_lines(lines: list[bytes]) -> list[dict[str, float]]:
+    # One decoder call per chunk instead of one per line.
+    return _json_array_decoder()(b"[" + b",".join(lines) + b"]")
+
+
+def compare_runs(baseline: dict[str, Any], current: dict[str, Any], max_regression: float = 0.05) -> dict[str, Any]:
+    """Per-percentile deltas between two reports, plus any perceived metric that newly crossed the GunUI target."""
+    deltas: dict[str, Any] = {}
+    regressions = []
+    crossed_target = []
+    for series in SERIES:
+        for metric in ("mean", *PERCENTILES):
+            then = baseline.get(series, {}).get(metric)
+            now = current.get(series, {}).get(metric)
+            if then is None or now is None:
+                continue
+            change = (now - then) / then if then else 0.0
+            deltas[f"{series}.{metric}"] = {
+                "baseline": then,
+                "current": now,
+                "delta_ms": round(now - then, 3),
+                "change": round(change, 4),
+            }
+            if change > max_regression:
+                regressions.append(f"{series}.{metric}")
+            if series == "perceived_latency_ms" and now > GUNUI_TARGET_MS >= then:
+                crossed_target.append(metric)
     return {
-        "sample_count": len(samples),
-        "raw_rtt_ms": {
-            "mean": round(statistics.fmean(raw), 3),
-            "p95": round(sorted(raw)[max(0, int(len(raw) * 0.95) - 1)], 3),
-        },
-        "perceived_latency_ms": {
-            "mean": round(statistics.fmean(perceived), 3),
-            "p95": round(sorted(perceived)[max(0, int(len(perceived) * 0.95) - 1)], 3),
-        },
-        "gunui_target_met": round(statistics.fmean(perceived), 3) <= 120.0,
+        "gunui_target_ms": GUNUI_TARGET_MS,
+        "max_regression": max_regression,
+        "baseline_target_met": baseline.get("gunui_target_met"),
+        "current_target_met": current.get("gunui_target_met"),
+        "crossed_target": crossed_target,
+        "regressions": regressions,
+        "deltas": deltas,
     }
 
 
 def _main() -> int:
     parser = argparse.ArgumentParser(description="Latency perception benchmark")
-    parser.add_argument("--input", type=Path, required=True)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", type=Path, help="JSON array of samples")
+    source.add_argument("--ndjson", help="One sample per line, streamed in chunks; '-' reads stdin")
+    parser.add_argument("--percentiles", choices=PERCENTILE_METHODS, default="exact")
+    parser.add_argument("--sketch-accuracy", type=float, default=DEFAULT_SKETCH_ACCURACY)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--baseline", type=Path, help="Earlier report to diff against")
+    parser.add_argument("--max-regression", type=float, default=0.05)
+    parser.add_argument("--output", type=Path, help="Also write the report here")
     args = parser.parse_args()
 
-    with args.input.open("r", encoding="utf-8") as handle:
-        samples = json.load(handle)
+    if args.input is not None:
+        with args.input.open("r", encoding="utf-8") as handle:
+            samples = json.load(handle)
+        result = score_chunks([samples], method=args.percentiles, sketch_accuracy=args.sketch_accuracy)
+    elif args.ndjson == "-":
+        chunks = iter_ndjson_chunks(sys.stdin.buffer, args.chunk_size)
+        result = score_chunks(chunks, method=args.percentiles, sketch_accuracy=args.sketch_accuracy)
+    else:
+        with open(args.ndjson, "rb") as handle:
+            chunks = iter_ndjson_chunks(handle, args.chunk_size)
+            result = score_chunks(chunks, method=args.percentiles, sketch_accuracy=args.sketch_accuracy)
+
+    failed = not result["gunui_target_met"]
+    if args.baseline is not None:
+        with args.baseline.open("r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        result["comparison"] = compare_runs(baseline, result, args.max_regression)
+        failed = failed or bool(result["comparison"]["regressions"] or result["comparison"]["crossed_target"])
 
-    result = run_benchmark(samples)
-    print(json.dumps(result, indent=2))
-    return 0 if result["gunui_target_met"] else 1
+    rendered = json.dumps(result, indent=2)
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(rendered + "\n", encoding="utf-8")
+    print(rendered)
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
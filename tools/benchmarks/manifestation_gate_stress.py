@@ -0,0 +1,126 @@
+"""Run from the repository root with ``python -m tools.benchmarks.manifestation_gate_stress``."""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import resource
+import time
+from pathlib import Path
+from typing import Any
+
+from tools.benchmarks.creative_stress_scenarios import ManifestationGateRegistry
+
+INTENTS = ("comfort", "guide", "celebrate", "stabilize", "warn")
+
+
+def build_batch(
+    rng: random.Random,
+    session_ids: list[str],
+    ticks: dict[str, int],
+    size: int,
+    lie_ratio: float,
+) -> list[tuple[str, int, str, str, float]]:
+    batch = []
+    for _ in range(size):
+        session_id = rng.choice(session_ids)
+        tick = ticks[session_id] = ticks[session_id] + rng.randint(0, 3)
+        intent = rng.choice(INTENTS)
+        stated = rng.choice(INTENTS) if rng.random() < lie_ratio else intent
+        batch.append((session_id, tick, intent, stated, rng.random()))
+    return batch
+
+
+def run_stress(
+    events: int,
+    sessions: int,
+    batch_size: int = 100_000,
+    cooldown_ticks: int = 1,
+    max_events_per_window: int = 3,
+    history_limit: int | None = 0,
+    max_sessions: int | None = None,
+    lie_ratio: float = 0.05,
+    seed: int = 11,
+) -> dict[str, Any]:
+    rng = random.Random(seed)
+    session_ids = [f"session-{idx}" for idx in range(sessions)]
+    ticks = dict.fromkeys(session_ids, 0)
+    registry = ManifestationGateRegistry(
+        cooldown_ticks=cooldown_ticks,
+        max_events_per_window=max_events_per_window,
+        history_limit=history_limit,
+        max_sessions=max_sessions,
+    )
+
+    # Event generation is excluded from the timing; only gate evaluation is measured.
+    evaluate = registry.evaluate
+    gate_seconds = 0.0
+    remaining = events
+    while remaining > 0:
+        batch = build_batch(rng, session_ids, ticks, min(batch_size, remaining), lie_ratio)
+        remaining -= len(batch)
+        started = time.perf_counter()
+        for row in batch:
+            evaluate(*row)
+        gate_seconds += time.perf_counter() - started
+
+    return {
+        "config": {
+            "events": events,
+            "sessions": sessions,
+            "cooldown_ticks": cooldown_ticks,
+            "max_events_per_window": max_events_per_window,
+            "history_limit": history_limit,
+            "max_sessions": max_sessions,
+            "lie_ratio": lie_ratio,
+        },
+        "gate_seconds": round(gate_seconds, 3),
+        "events_per_sec": round(events / gate_seconds, 1) if gate_seconds > 0 else None,
+        "ns_per_event": round(gate_seconds / events * 1e9, 1) if events else None,
+        "live_sessions": len(registry),
+        "evicted_sessions": registry.evicted_sessions,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "counters": registry.counters(),
+    }
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(description="ManifestationGate throughput across many sessions")
+    parser.add_argument("--events", type=int, default=2_000_000)
+    parser.add_argument("--sessions", type=int, default=5_000)
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--cooldown-ticks", type=int, default=1)
+    parser.add_argument("--max-events-per-window", type=int, default=3)
+    parser.add_argument(
+        "--history-limit",
+        type=int,
+        default=0,
+        help="Per-session ring buffer of decisions; 0 keeps counters only",
+    )
+    parser.add_argument("--max-sessions", type=int, help="Evict least recently seen sessions beyond this many")
+    parser.add_argument("--lie-ratio", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    report = run_stress(
+        events=args.events,
+        sessions=args.sessions,
+        batch_size=args.batch_size,
+        cooldown_ticks=args.cooldown_ticks,
+        max_events_per_window=args.max_events_per_window,
+        history_limit=args.history_limit,
+        max_sessions=args.max_sessions,
+        lie_ratio=args.lie_ratio,
+        seed=args.seed,
+    )
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(rendered + "\n", encoding="utf-8")
+    print(rendered)
+    return 0 if report["counters"]["evaluated"] == args.events else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
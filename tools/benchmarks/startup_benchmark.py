@@ -0,0 +1,98 @@
+"""Run from the repository root with ``python -m tools.benchmarks.startup_benchmark``."""
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from tools.benchmarks.gateway_load_benchmark import REPO_ROOT, _free_port
+
+POLL_INTERVAL_SECONDS = 0.005
+STARTUP_MODES = {"lazy": {"AGNS_EAGER_STARTUP": "0"}, "eager": {"AGNS_EAGER_STARTUP": "1"}}
+
+
+def _health_ok(port: int) -> bool:
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=0.5)
+    try:
+        connection.request("GET", "/health")
+        return connection.getresponse().status == 200
+    except OSError:
+        return False
+    finally:
+        connection.close()
+
+
+def time_to_first_health(env_overrides: dict[str, str], timeout: float = 30.0) -> float:
+    """Seconds from spawning uvicorn to the first 200 from ``/health``."""
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "api_gateway.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning",
+        ],
+        cwd=REPO_ROOT,
+        env={**os.environ, **env_overrides},
+    )
+    try:
+        while not _health_ok(port):
+            if process.poll() is not None:
+                raise RuntimeError(f"gateway exited with code {process.returncode} during startup")
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError("gateway did not answer /health in time")
+            time.sleep(POLL_INTERVAL_SECONDS)
+        return time.perf_counter() - started
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run_startup(modes: list[str], runs: int) -> dict[str, Any]:
+    # One discarded start compiles bytecode, like an image built with .pyc files would have.
+    time_to_first_health(STARTUP_MODES[modes[0]])
+    results = {}
+    for mode in modes:
+        samples = sorted(time_to_first_health(STARTUP_MODES[mode]) * 1000 for _ in range(runs))
+        results[mode] = {
+            "median_ms": round(statistics.median(samples), 1),
+            "min_ms": round(samples[0], 1),
+            "max_ms": round(samples[-1], 1),
+        }
+    return {"runs": runs, "modes": results}
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(description="Time from process spawn to the first successful /health")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", choices=sorted(STARTUP_MODES), default=["lazy", "eager"])
+    parser.add_argument("--budget-ms", type=float, help="Fail if any mode's median exceeds this")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    report = run_startup(args.modes, args.runs)
+    over = [
+        mode for mode, result in report["modes"].items()
+        if args.budget_ms is not None and result["median_ms"] > args.budget_ms
+    ]
+    report["over_budget"] = over
+
+    rendered = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(rendered + "\n", encoding="utf-8")
+    print(rendered)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
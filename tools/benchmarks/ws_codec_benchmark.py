@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import copy
+import importlib
+import importlib.util
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SAMPLE_PAYLOAD = REPO_ROOT / "api_gateway" / "sample_emit_payload.json"
+
+
+def build_frame(sample: dict[str, Any], keyframes: int) -> dict[str, Any]:
+    submission = copy.deepcopy(sample)
+    particle_physics = submission["model_response"]["visual_manifestation"]["particle_physics"]
+    submission["model_response"]["visual_manifestation"]["keyframes"] = [
+        {
+            "t": round(idx / max(1, keyframes), 6),
+            "turbulence": round((particle_physics["turbulence"] + idx * 0.001) % 1.0, 6),
+            "luminance_mass": round((particle_physics["luminance_mass"] - idx * 0.0005) % 1.0, 6),
+            "flow_direction": particle_physics["flow_direction"],
+        }
+        for idx in range(keyframes)
+    ]
+    return {"type": "dsl_submission", "seq": 1, "submission": submission}
+
+
+def _time_per_op(fn: Callable[[], Any], iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+
+def _codecs() -> dict[str, tuple[Callable[[Any], Any], Callable[[Any], Any]]]:
+    codecs: dict[str, tuple[Callable[[Any], Any], Callable[[Any], Any]]] = {
+        # Mirrors Starlette's send_json/receive_json text path.
+        "json": (
+            lambda obj: json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8"),
+            lambda data: json.loads(data.decode("utf-8")),
+        ),
+    }
+    if importlib.util.find_spec("msgspec"):
+        msgspec = importlib.import_module("msgspec")
+        codecs["msgpack"] = (msgspec.msgpack.encode, msgspec.msgpack.decode)
+    return codecs
+
+
+def run_benchmark(keyframe_counts: list[int], iterations: int) -> dict[str, Any]:
+    with SAMPLE_PAYLOAD.open("r", encoding="utf-8") as handle:
+        sample = json.load(handle)
+
+    results = []
+    for keyframes in keyframe_counts:
+        frame = build_frame(sample, keyframes)
+        row: dict[str, Any] = {"keyframes": keyframes}
+        for name, (encode, decode) in _codecs().items():
+            encoded = encode(frame)
+            if decode(encoded) != frame:
+                raise AssertionError(f"{name} roundtrip mismatch for {keyframes} keyframes")
+            row[name] = {
+                "bytes": len(encoded),
+                "encode_us": round(_time_per_op(lambda: encode(frame), iterations), 3),
+                "decode_us": round(_time_per_op(lambda: decode(encoded), iterations), 3),
+            }
+        if "msgpack" in row:
+            row["msgpack_vs_json"] = {
+                "bytes_ratio": round(row["msgpack"]["bytes"] / row["json"]["bytes"], 3),
+                "encode_speedup": round(row["json"]["encode_us"] / max(row["msgpack"]["encode_us"], 1e-9), 2),
+                "decode_speedup": round(row["json"]["decode_us"] / max(row["msgpack"]["decode_us"], 1e-9), 2),
+            }
+        results.append(row)
+
+    return {"iterations": iterations, "codecs": sorted(_codecs()), "frames": results}
+
+
+def _main() -> int:
+    parser = argparse.ArgumentParser(description="JSON vs msgpack WebSocket frame codec benchmark")
+    parser.add_argument("--keyframes", type=int, nargs="+", default=[0, 64, 1024, 8192])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(json.dumps(run_benchmark(args.keyframes, args.iterations), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(_main())
@@ -2,11 +2,23 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import copy
+import functools
+import importlib
+import importlib.util
 import json
 import math
+import operator
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Any, Literal
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Literal
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
 SCHEMA_DIR = REPO_ROOT / "docs" / "schemas"
@@ -35,67 +47,128 @@ DEFAULT_CADENCE_BY_PHASE = {
 
 Mode = Literal["strict", "legacy"]
 
+# Below this many predictions the array setup costs more than the Python loop it replaces.
+IPW_VECTORIZE_MIN_PREDICTIONS = 64
+_NUMERIC_TYPES = frozenset({int, float})
+_GET_P = operator.itemgetter("p")
+
+CORPUS_BATCH_LINES = 2_000
+CORPUS_SAMPLE_ERRORS = 20
+_ARRAY_INDEX = re.compile(r"\[\d+\]")
+
 
 def _load_json(path: Path) -> Any:
     with path.open("r", encoding="utf-8") as handle:
         return json.load(handle)
 
 
-def _type_ok(expected: str, value: Any) -> bool:
-    return {
-        "object": lambda v: isinstance(v, dict),
-        "array": lambda v: isinstance(v, list),
-        "string": lambda v: isinstance(v, str),
-        "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
-        "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
-        "boolean": lambda v: isinstance(v, bool),
-    }.get(expected, lambda _v: True)(value)
+_TYPE_CHECKS: dict[str, Callable[[Any], bool]] = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+}
 
+# A compiled validator returns (path suffix, rule, message) triples. Suffixes are only built while an
+# error unwinds through its parents, so valid payloads never format a path.
+SchemaError = tuple[str, str, str]
+CompiledValidator = Callable[[Any], list[SchemaError]]
+
+_NO_ERRORS: list[SchemaError] = []
 
-def _validate(schema: dict[str, Any], payload: Any, path: str = "<root>") -> list[str]:
-    errors: list[str] = []
 
+def _type_ok(expected: str, value: Any) -> bool:
+    check = _TYPE_CHECKS.get(expected)
+    return check is None or check(value)
+
+
+def compile_schema(schema: dict[str, Any]) -> CompiledValidator:
+    """Compile a schema into a closure tree; the result must be rebuilt if the schema dict is mutated."""
     expected_type = schema.get("type")
-    if expected_type and not _type_ok(expected_type, payload):
-        return [f"{path}: expected {expected_type}, got {type(payload).__name__}"]
-
-    if "const" in schema and payload != schema["const"]:
-        errors.append(f"{path}: expected const value {schema['const']!r}")
-
-    if "enum" in schema and payload not in schema["enum"]:
-        errors.append(f"{path}: value {payload!r} not in enum {schema['enum']!r}")
-
-    if isinstance(payload, (int, float)) and not isinstance(payload, bool):
-        if "minimum" in schema and payload < schema["minimum"]:
-            errors.append(f"{path}: value {payload} below minimum {schema['minimum']}")
-        if "maximum" in schema and payload > schema["maximum"]:
-            errors.append(f"{path}: value {payload} above maximum {schema['maximum']}")
-
-    if isinstance(payload, dict):
-        required = schema.get("required", [])
-        for key in required:
-            if key not in payload:
-                errors.append(f"{path}: missing required property '{key}'")
-
-        properties = schema.get("properties", {})
-        additional_allowed = schema.get("additionalProperties", True)
-        if additional_allowed is False:
-            for key in payload.keys() - properties.keys():
-                errors.append(f"{path}: unexpected property '{key}'")
-
-        for key, subschema in properties.items():
-            if key in payload:
-                errors.extend(_validate(subschema, payload[key], f"{path}.{key}"))
-
-    if isinstance(payload, list):
-        if "minItems" in schema and len(payload) < schema["minItems"]:
-            errors.append(f"{path}: expected at least {schema['minItems']} items")
-        item_schema = schema.get("items")
-        if item_schema:
-            for idx, value in enumerate(payload):
-                errors.extend(_validate(item_schema, value, f"{path}[{idx}]"))
+    type_check = _TYPE_CHECKS.get(expected_type) if expected_type else None
+    has_const = "const" in schema
+    const = schema.get("const")
+    has_enum = "enum" in schema
+    enum = schema.get("enum")
+    has_minimum = "minimum" in schema
+    minimum = schema.get("minimum")
+    has_maximum = "maximum" in schema
+    maximum = schema.get("maximum")
+    check_numeric = has_minimum or has_maximum
+
+    required = tuple(schema.get("required", []))
+    properties = schema.get("properties", {})
+    property_validators = tuple((key, compile_schema(subschema)) for key, subschema in properties.items())
+    closed = schema.get("additionalProperties", True) is False
+    check_object = bool(required or property_validators or closed)
+
+    has_min_items = "minItems" in schema
+    min_items = schema.get("minItems")
+    item_schema = schema.get("items")
+    item_validator = compile_schema(item_schema) if item_schema else None
+    check_array = has_min_items or item_validator is not None
+
+    def validate(payload: Any) -> list[SchemaError]:
+        if type_check is not None and not type_check(payload):
+            return [("", "type", f"expected {expected_type}, got {type(payload).__name__}")]
+
+        errors: list[SchemaError] | None = None
+        if has_const and payload != const:
+            errors = [("", "const", f"expected const value {const!r}")]
+
+        if has_enum and payload not in enum:
+            errors = errors or []
+            errors.append(("", "enum", f"value {payload!r} not in enum {enum!r}"))
+
+        if check_numeric and isinstance(payload, (int, float)) and not isinstance(payload, bool):
+            if has_minimum and payload < minimum:
+                errors = errors or []
+                errors.append(("", "minimum", f"value {payload} below minimum {minimum}"))
+            if has_maximum and payload > maximum:
+                errors = errors or []
+                errors.append(("", "maximum", f"value {payload} above maximum {maximum}"))
+
+        if check_object and isinstance(payload, dict):
+            for key in required:
+                if key not in payload:
+                    errors = errors or []
+                    errors.append(("", "required", f"missing required property '{key}'"))
+            if closed:
+                for key in payload.keys() - properties.keys():
+                    errors = errors or []
+                    errors.append(("", "additionalProperties", f"unexpected property '{key}'"))
+            for key, child in property_validators:
+                if key in payload:
+                    child_errors = child(payload[key])
+                    if child_errors:
+                        errors = errors or []
+                        errors.extend((f".{key}{suffix}", rule, message) for suffix, rule, message in child_errors)
+
+        if check_array and isinstance(payload, list):
+            if has_min_items and len(payload) < min_items:
+                errors = errors or []
+                errors.append(("", "minItems", f"expected at least {min_items} items"))
+            if item_validator is not None:
+                for idx, value in enumerate(payload):
+                    child_errors = item_validator(value)
+                    if child_errors:
+                        errors = errors or []
+                        errors.extend((f"[{idx}]{suffix}", rule, message) for suffix, rule, message in child_errors)
+
+        return errors or _NO_ERRORS
+
+    return validate
+
+
+def _format_errors(errors: list[SchemaError], path: str = "<root>") -> list[str]:
+    return [f"{path}{suffix}: {message}" for suffix, _rule, message in errors]
 
-    return errors
+
+def _validate(schema: dict[str, Any], payload: Any, path: str = "<root>") -> list[str]:
+    # Compiled per call: the dict may be edited between calls. Hot paths use _contract_validator instead.
+    return _format_errors(compile_schema(schema)(payload), path)
 
 
 def _inject_embodiment_defaults(payload: dict[str, Any], audits: list[str]) -> None:
@@ -109,19 +182,17 @@ def _inject_embodiment_defaults(payload: dict[str, Any], audits: list[str]) -> N
     audits.append(f"embodiment_v1: injected deterministic cadence default for phase={phase!r}: {cadence}")
 
 
-def _check_ipw_probability_policy(payload: dict[str, Any], audits: list[str]) -> list[str]:
-    errors: list[str] = []
-    policy = payload.get("probability_policy", {})
-    if not policy.get("requires_normalization", False):
-        return errors
+@functools.lru_cache(maxsize=None)
+def _load_numpy() -> Any | None:
+    if importlib.util.find_spec("numpy") is None:
+        return None
+    return importlib.import_module("numpy")
 
-    epsilon = float(policy.get("epsilon", 0.0001))
-    on_violation = policy.get("on_violation", "error")
-    predictions = payload.get("predictions", [])
 
+def _probability_sum_scalar(values: list[Any]) -> tuple[list[str], float]:
+    errors: list[str] = []
     probabilities: list[float] = []
-    for idx, row in enumerate(predictions):
-        value = row.get("p")
+    for idx, value in enumerate(values):
         if value is None or isinstance(value, bool):
             errors.append(f"<root>.predictions[{idx}].p: missing or invalid numeric probability")
             continue
@@ -133,11 +204,56 @@ def _check_ipw_probability_policy(payload: dict[str, Any], audits: list[str]) ->
             errors.append(f"<root>.predictions[{idx}].p: negative probability is not allowed")
             continue
         probabilities.append(numeric)
+    return errors, math.fsum(probabilities)
+
+
+def _probability_sum_vectorized(np: Any, values: list[Any]) -> tuple[list[str], float, Any]:
+    probabilities = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(probabilities)
+    rejected = ~finite | (probabilities < 0)
+    if rejected.any():
+        errors = [
+            f"<root>.predictions[{idx}].p: NaN/Inf is not allowed"
+            if not finite[idx]
+            else f"<root>.predictions[{idx}].p: negative probability is not allowed"
+            for idx in np.flatnonzero(rejected).tolist()
+        ]
+        return errors, 0.0, probabilities
+    # ``values`` holds only ints and floats here, and fsum over the list skips boxing numpy scalars.
+    return [], math.fsum(values), probabilities
+
+
+def _check_ipw_probability_policy(
+    payload: dict[str, Any],
+    audits: list[str],
+    vectorize: bool | None = None,
+) -> list[str]:
+    errors: list[str] = []
+    policy = payload.get("probability_policy", {})
+    if not policy.get("requires_normalization", False):
+        return errors
+
+    epsilon = float(policy.get("epsilon", 0.0001))
+    on_violation = policy.get("on_violation", "error")
+    predictions = payload.get("predictions", [])
+
+    try:
+        values = list(map(_GET_P, predictions))
+    except KeyError:
+        values = [row.get("p") for row in predictions]
+    if vectorize is None:
+        vectorize = len(values) >= IPW_VECTORIZE_MIN_PREDICTIONS
+    np = _load_numpy() if vectorize else None
+    probabilities = None
+    # None/bool/str probabilities need the per-item messages and coercions of the scalar loop.
+    if np is not None and _NUMERIC_TYPES.issuperset(map(type, values)):
+        errors, total, probabilities = _probability_sum_vectorized(np, values)
+    else:
+        errors, total = _probability_sum_scalar(values)
 
     if errors:
         return errors
 
-    total = sum(probabilities)
     if total == 0:
         return ["<root>.predictions: probability sum is 0, cannot normalize"]
 
@@ -145,8 +261,12 @@ def _check_ipw_probability_policy(payload: dict[str, Any], audits: list[str]) ->
         return errors
 
     if on_violation == "normalize":
-        for row in predictions:
-            row["p"] = row["p"] / total
+        if probabilities is not None:
+            # Drive setitem from C; this write-back dominates once the arithmetic is vectorized.
+            deque(map(operator.setitem, predictions, repeat("p"), (probabilities / total).tolist()), maxlen=0)
+        else:
+            for row in predictions:
+                row["p"] = row["p"] / total
         audits.append(
             (
                 "ipw_validation.audit.normalized=true "
@@ -194,15 +314,212 @@ def run_contract_checks(mode: Mode = "strict") -> int:
     return failures
 
 
+_CONTRACT_VALIDATORS: dict[str, CompiledValidator] = {}
+
+
+def _contract_validator(contract_name: str) -> CompiledValidator:
+    # Compiled once per process; pool workers keep theirs across batches.
+    validator = _CONTRACT_VALIDATORS.get(contract_name)
+    if validator is None:
+        validator = _CONTRACT_VALIDATORS[contract_name] = compile_schema(_load_json(CHECKS[contract_name]["schema"]))
+    return validator
+
+
+def _aggregate_path(path: str) -> str:
+    # Collapse array indices so the error table stays bounded by schema shape, not corpus size.
+    return _ARRAY_INDEX.sub("[*]", path)
+
+
+def _new_corpus_counts() -> dict[str, Any]:
+    return {"payloads": 0, "invalid": 0, "audited": 0, "errors": {}, "samples": []}
+
+
+def _record_error(counts: dict[str, Any], line_number: int, path: str, rule: str, message: str) -> None:
+    key = (_aggregate_path(path), rule)
+    counts["errors"][key] = counts["errors"].get(key, 0) + 1
+    if len(counts["samples"]) < CORPUS_SAMPLE_ERRORS:
+        counts["samples"].append({"line": line_number, "rule": rule, "error": f"{path}: {message}"})
+
+
+def _check_batch(contract_name: str, lines: list[tuple[int, bytes]], mode: Mode) -> dict[str, Any]:
+    validator = _contract_validator(contract_name)
+    counts = _new_corpus_counts()
+    for line_number, line in lines:
+        counts["payloads"] += 1
+        try:
+            payload = json.loads(line)
+        except ValueError as exc:
+            counts["invalid"] += 1
+            _record_error(counts, line_number, "<root>", "json", f"invalid JSON: {exc}")
+            continue
+
+        audits: list[str] = []
+        policy_errors: list[str] = []
+        crashed = False
+        if isinstance(payload, dict):
+            try:
+                policy_errors = _apply_contract_policy(contract_name, payload, audits, mode=mode)
+            except (TypeError, AttributeError, KeyError, ValueError, ArithmeticError) as exc:
+                # The policy walks the envelope before the schema has vetted its shape; one malformed
+                # payload must not abort the rest of the corpus.
+                crashed = True
+                _record_error(counts, line_number, "<root>", "policy_error", f"{type(exc).__name__}: {exc}")
+        schema_errors = validator(payload)
+        if audits:
+            counts["audited"] += 1
+        if crashed or policy_errors or schema_errors:
+            counts["invalid"] += 1
+            for error in policy_errors:
+                path, _, message = error.partition(": ")
+                _record_error(counts, line_number, path, "probability_policy", message)
+            for suffix, rule, message in schema_errors:
+                _record_error(counts, line_number, f"<root>{suffix}", rule, message)
+    return counts
+
+
+def _merge_corpus_counts(totals: dict[str, Any], partial: dict[str, Any]) -> None:
+    for key in ("payloads", "invalid", "audited"):
+        totals[key] += partial[key]
+    for key, count in partial["errors"].items():
+        totals["errors"][key] = totals["errors"].get(key, 0) + count
+    room = CORPUS_SAMPLE_ERRORS - len(totals["samples"])
+    if room > 0:
+        totals["samples"].extend(partial["samples"][:room])
+
+
+def _iter_batches(lines: Iterable[bytes], batch_lines: int) -> Iterator[list[tuple[int, bytes]]]:
+    batch: list[tuple[int, bytes]] = []
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        batch.append((line_number, line))
+        if len(batch) >= batch_lines:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def validate_corpus(
+    contract_name: str,
+    source: Path | BinaryIO,
+    workers: int = 1,
+    batch_lines: int = CORPUS_BATCH_LINES,
+    mode: Mode = "strict",
+) -> dict[str, Any]:
+    """Check one NDJSON payload per line; at most ``2 * workers`` batches are held in memory at once."""
+    if contract_name not in CHECKS:
+        raise ValueError(f"unknown contract {contract_name!r}")
+    totals = _new_corpus_counts()
+    started = time.perf_counter()
+    with contextlib.ExitStack() as stack:
+        handle = stack.enter_context(source.open("rb")) if isinstance(source, Path) else source
+        batches = _iter_batches(handle, batch_lines)
+        if workers == 1:
+            for batch in batches:
+                _merge_corpus_counts(totals, _check_batch(contract_name, batch, mode))
+        else:
+            max_workers = workers or os.cpu_count() or 1
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=max_workers))
+            pending: deque[Future[dict[str, Any]]] = deque()
+            for batch in batches:
+                pending.append(pool.submit(_check_batch, contract_name, batch, mode))
+                if len(pending) >= 2 * max_workers:
+                    _merge_corpus_counts(totals, pending.popleft().result())
+            while pending:
+                _merge_corpus_counts(totals, pending.popleft().result())
+    seconds = time.perf_counter() - started
+
+    errors = sorted(totals.pop("errors").items(), key=lambda item: (-item[1], item[0]))
+    return {
+        "contract": contract_name,
+        "source": str(source) if isinstance(source, Path) else "<stdin>",
+        "mode": mode,
+        **totals,
+        "invalid_ratio": round(totals["invalid"] / totals["payloads"], 6) if totals["payloads"] else None,
+        "errors": [{"path": path, "rule": rule, "count": count} for (path, rule), count in errors],
+        "seconds": round(seconds, 4),
+        "payloads_per_sec": round(totals["payloads"] / seconds, 1) if seconds > 0 else None,
+    }
+
+
+def _parse_corpus_arg(value: str) -> tuple[str, str]:
+    contract_name, sep, path = value.partition("=")
+    if not sep or not path or contract_name not in CHECKS:
+        raise argparse.ArgumentTypeError(f"expected CONTRACT=PATH (PATH may be '-') with CONTRACT in {sorted(CHECKS)}")
+    return contract_name, path
+
+
+def run_corpus_checks(
+    corpora: list[tuple[str, str]],
+    mode: Mode = "strict",
+    workers: int = 1,
+    max_invalid_ratio: float = 0.0,
+    summary_path: Path | None = None,
+) -> int:
+    failures = 0
+    reports = []
+    for contract_name, path in corpora:
+        source = sys.stdin.buffer if path == "-" else Path(path)
+        report = validate_corpus(contract_name, source, workers=workers, mode=mode)
+        # An empty sample proves nothing, so it never passes the gate.
+        report["passed"] = bool(report["payloads"]) and report["invalid_ratio"] <= max_invalid_ratio
+        failures += not report["passed"]
+        reports.append(report)
+
+        print(
+            f"[{'PASS' if report['passed'] else 'FAIL'}] {contract_name} corpus {report['source']}: "
+            f"{report['payloads']} payloads, {report['invalid']} invalid, {report['payloads_per_sec']} payloads/sec"
+        )
+        for row in report["errors"][:5]:
+            print(f"  - {row['path']} [{row['rule']}] x{row['count']}")
+        if report["audited"]:
+            print(f"  [AUDIT] {report['audited']} payloads adjusted by contract policy")
+
+    if summary_path is not None:
+        summary = {"mode": mode, "max_invalid_ratio": max_invalid_ratio, "failures": failures, "corpora": reports}
+        summary_path.parent.mkdir(parents=True, exist_ok=True)
+        summary_path.write_text(json.dumps(summary, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return failures
+
+
 def _parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Validate canonical contracts against real payload fixtures")
     mode_group = parser.add_mutually_exclusive_group()
     mode_group.add_argument("--strict", action="store_true", help="Strict mode for CI/PR gate (default)")
     mode_group.add_argument("--legacy", action="store_true", help="Legacy compatibility mode with cadence injection")
+    parser.add_argument(
+        "--corpus",
+        type=_parse_corpus_arg,
+        action="append",
+        default=[],
+        metavar="CONTRACT=PATH",
+        help="Check an NDJSON corpus (one payload per line, '-' for stdin) against CONTRACT instead of the fixtures",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Corpus validation processes; 0 uses one per CPU")
+    parser.add_argument(
+        "--max-invalid-ratio",
+        type=float,
+        default=0.0,
+        help="Fail a corpus only when invalid/payloads exceeds this ratio",
+    )
+    parser.add_argument("--summary-json", type=Path, help="Write the aggregated corpus report to this file")
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = _parse_args()
     selected_mode: Mode = "legacy" if args.legacy else "strict"
+    if args.corpus:
+        raise SystemExit(
+            1
+            if run_corpus_checks(
+                args.corpus,
+                mode=selected_mode,
+                workers=args.workers,
+                max_invalid_ratio=args.max_invalid_ratio,
+                summary_path=args.summary_json,
+            )
+            else 0
+        )
     raise SystemExit(1 if run_contract_checks(mode=selected_mode) else 0)